@@ -0,0 +1,42 @@
+# The Prewitt compass bank: eight convolutions with a max/argmax against the single-pass compass_prewitt
+import cv2 as cv
+import numpy as np
+
+from common import best_ms, load_gray
+from edge_detection import compass_prewitt, COMPASS_DIRECTIONS
+from image import Image, DesiredDepth, Padding
+
+SIZE = 2000
+
+
+def eight_convolutions(img: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    responses = []
+    for mask in COMPASS_DIRECTIONS:
+        image = Image.from_numpy(img, "compass")
+        image.convolve(mask.value, DesiredDepth.F64, Padding.REPLICATE, normalize=False)
+        responses.append(image.img)
+    responses = np.stack(responses)
+    return responses.max(axis=0), responses.argmax(axis=0)
+
+
+def eight_filter2d(img: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    responses = np.stack([cv.filter2D(img, cv.CV_32F, mask.value.astype(np.float32), borderType=cv.BORDER_REPLICATE)
+                          for mask in COMPASS_DIRECTIONS])
+    return responses.max(axis=0), responses.argmax(axis=0)
+
+
+def main():
+    img = load_gray("lena.png", SIZE)
+
+    expected_response, expected_direction = eight_filter2d(img)
+    response, direction = compass_prewitt(img, cv.BORDER_REPLICATE)
+    assert np.array_equal(response, expected_response) and np.array_equal(direction, expected_direction)
+
+    print(f"lena.png at {SIZE}x{SIZE}, max and argmax included")
+    print(f"  eight Image.convolve calls   {best_ms(lambda: eight_convolutions(img), 3):7.1f} ms")
+    print(f"  eight float32 filter2D       {best_ms(lambda: eight_filter2d(img), 3):7.1f} ms")
+    print(f"  compass_prewitt              {best_ms(lambda: compass_prewitt(img, cv.BORDER_REPLICATE)):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
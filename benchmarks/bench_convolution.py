@@ -0,0 +1,38 @@
+# Convolution paths for rank-1 kernels: one dense filter2D pass, two separable passes, and what the planner picks
+import cv2 as cv
+import numpy as np
+
+from common import best_ms, random_gray
+from convolution import plan_convolution, apply_convolution_plan, separable_factors
+
+SIZE = 1000
+KERNEL_SIZES = [3, 7, 11, 15, 21, 31, 63]
+DEPTHS = [("8U", cv.CV_8U), ("64F", cv.CV_64F)]
+
+
+def main():
+    img = random_gray(SIZE)
+    rng = np.random.default_rng(1)
+
+    print(f"ms at {SIZE}x{SIZE}")
+    header = "  ".join(f"{name + ': dense':>10} {'sep':>6} {'planned':<10}" for name, _ in DEPTHS)
+    print(f"{'size':>4}  {header}")
+    for size in KERNEL_SIZES:
+        column, row = rng.random(size), rng.random(size)
+        kernel = np.outer(column, row)
+        kernel /= kernel.sum()
+
+        cells = []
+        for name, ddepth in DEPTHS:
+            plan = plan_convolution(kernel, ddepth)
+            dense = best_ms(lambda: cv.filter2D(img, ddepth, kernel, borderType=cv.BORDER_REPLICATE))
+            factor_column, factor_row = separable_factors(kernel)
+            separable = best_ms(lambda: cv.sepFilter2D(img, ddepth, factor_row, factor_column,
+                                                       borderType=cv.BORDER_REPLICATE))
+            planned = best_ms(lambda: apply_convolution_plan(img, plan, ddepth, cv.BORDER_REPLICATE))
+            cells.append(f"{dense:>10.1f} {separable:>6.1f} {plan.path.name:<10}({planned:.1f})")
+        print(f"{size:>4}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# Histogram counts: the original per-level comparison against the single calcHist pass
+import numpy as np
+
+from common import best_ms, random_gray
+from image import histogram_counts, LMIN, LMAX
+
+SIZES = [256, 1000, 3000]
+
+
+def legacy_histogram(img: np.ndarray) -> np.ndarray:
+    img_array = img.flatten()
+    return np.vectorize(lambda px: np.count_nonzero(img_array == px))(np.arange(LMAX - LMIN + 1))
+
+
+def main():
+    print(f"{'size':>11} {'legacy ms':>10} {'calcHist ms':>12} {'speed-up':>9}")
+    for size in SIZES:
+        img = random_gray(size)
+        assert np.array_equal(legacy_histogram(img), histogram_counts(img))
+        legacy = best_ms(lambda: legacy_histogram(img), 1)
+        current = best_ms(lambda: histogram_counts(img))
+        print(f"{size:>5}x{size:<5} {legacy:>10.1f} {current:>12.2f} {legacy / current:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Histogram stretching and equalization as 256-entry tables, on every bundled image scaled to ~50 MP.
+# Reported as GB/s of pixels read and written, next to a plain memory copy of the same image. The table pass alone
+# is the LUT column; stretch adds a min/max pass and equalize a histogram pass over the pixels.
+import math
+import os
+
+import cv2 as cv
+import numpy as np
+
+from common import best_ms, load_gray, TEST_IMAGES_DIR
+from image import Image
+
+TARGET_PIXELS = 50_000_000
+IMAGE_EXTENSIONS = (".bmp", ".jpg", ".png")
+
+# The original per-pixel np.vectorize takes minutes at 50 MP, it is checked and timed on a small copy only
+LEGACY_SIZE = 512
+
+
+def legacy_stretch(img: np.ndarray, new_min: int, new_max: int) -> np.ndarray:
+    curr_min = np.min(img)
+    curr_max = np.max(img)
+
+    def f(px): return int((px - curr_min) * new_max / (curr_max - curr_min))
+    def stretch_f(px): return max(new_min, min(f(px), new_max))
+
+    return np.uint8(np.vectorize(stretch_f)(img))
+
+
+def legacy_equalize(img: np.ndarray) -> np.ndarray:
+    cs = np.cumsum(np.bincount(img.ravel(), minlength=256))
+    curr_min, curr_max = np.min(cs), np.max(cs)
+
+    def f(px): return int((px - curr_min) * 255 / (curr_max - curr_min))
+    def stretch_f(px): return max(0, min(f(px), 255))
+
+    return np.uint8(np.vectorize(stretch_f)(cs))[img]
+
+
+def stretched(img: np.ndarray) -> np.ndarray:
+    image = Image.from_numpy(img, "stretch", copy=False)
+    image.stretch_histogram(20, 200)
+    return image.img
+
+
+def equalized(img: np.ndarray) -> np.ndarray:
+    image = Image.from_numpy(img, "equalize", copy=False)
+    image.equalize_histogram()
+    return image.img
+
+
+def gigabytes_per_second(img: np.ndarray, ms: float) -> float:
+    # Every pixel is read once and written once
+    return 2 * img.nbytes / ms / 1e6
+
+
+def main():
+    names = sorted(name for name in os.listdir(TEST_IMAGES_DIR) if name.lower().endswith(IMAGE_EXTENSIONS))
+
+    print(f"{'image':>28} {'MP':>5} {'memcpy GB/s':>12} {'LUT GB/s':>9} {'stretch GB/s':>13} {'equalize GB/s':>14}")
+    for name in names:
+        original = load_gray(name)
+        if original is None or original.min() == original.max():
+            continue
+
+        small = load_gray(name, LEGACY_SIZE)
+        if small.min() < small.max():
+            assert np.array_equal(legacy_stretch(small, 20, 200), stretched(small))
+            assert np.array_equal(legacy_equalize(small), equalized(small))
+
+        scale = math.sqrt(TARGET_PIXELS / original.size)
+        height, width = original.shape
+        img = cv.resize(original, (round(width * scale), round(height * scale)), interpolation=cv.INTER_LINEAR)
+
+        # Both operations write a new array and leave img as it is
+        lut = np.arange(256, dtype=np.uint8)[::-1].copy()
+        copy_ms = best_ms(lambda: np.copyto(np.empty_like(img), img), 3)
+        lut_ms = best_ms(lambda: cv.LUT(img, lut), 3)
+        stretch_ms = best_ms(lambda: stretched(img), 3)
+        equalize_ms = best_ms(lambda: equalized(img), 3)
+        print(f"{name:>28} {img.size / 1e6:>5.1f} {gigabytes_per_second(img, copy_ms):>12.2f} "
+              f"{gigabytes_per_second(img, lut_ms):>9.2f} "
+              f"{gigabytes_per_second(img, stretch_ms):>13.2f} {gigabytes_per_second(img, equalize_ms):>14.2f}")
+
+    small = load_gray("lena.png", LEGACY_SIZE)
+    print(f"legacy on lena.png at {LEGACY_SIZE}x{LEGACY_SIZE}: stretch {best_ms(lambda: legacy_stretch(small, 20, 200), 1):.0f} ms, "
+          f"tables {best_ms(lambda: stretched(small)):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
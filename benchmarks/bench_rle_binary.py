@@ -0,0 +1,59 @@
+# Binary RLE files: the original byte-by-byte decoder over test_images/rle, then raw encode/decode throughput
+# tests/test_rle.py::test_throughput holds the same throughput to a floor on every test run
+import os
+
+import numpy as np
+
+from common import best_ms, load_gray, TEST_IMAGES_DIR
+from image_utils import make_binary_rle_arrays, parse_binary_rle
+from utils import run_lengths
+
+RLE_DIR = os.path.join(TEST_IMAGES_DIR, "rle")
+THROUGHPUT_SIZE = (4000, 2650)
+
+
+def legacy_parse_binary_rle(input_bytes: bytearray) -> np.ndarray:
+    temp_bytes = input_bytes.copy()
+    height = int.from_bytes(temp_bytes[:4], byteorder="big")
+    del temp_bytes[:4]
+    width = int.from_bytes(temp_bytes[:4], byteorder="big")
+    del temp_bytes[:4]
+
+    result = np.zeros(height * width, dtype=np.uint8)
+    filled = 0
+    while temp_bytes:
+        value = int.from_bytes(temp_bytes[:2], byteorder="big")
+        count = int.from_bytes(temp_bytes[2:6], byteorder="big")
+        del temp_bytes[:6]
+        result[filled: filled + count] = value
+        filled += count
+
+    return result.reshape((height, width))
+
+
+def main():
+    files = []
+    for name in sorted(os.listdir(RLE_DIR)):
+        with open(os.path.join(RLE_DIR, name), "rb") as f:
+            files.append(bytearray(f.read()))
+    for data in files:
+        assert np.array_equal(legacy_parse_binary_rle(data), parse_binary_rle(data))
+
+    legacy = best_ms(lambda: [legacy_parse_binary_rle(data) for data in files], 1)
+    current = best_ms(lambda: [parse_binary_rle(data) for data in files])
+    print(f"decode all of test_images/rle: legacy {legacy:.1f} ms, structured dtypes {current:.2f} ms")
+
+    # A photo has a run almost every pixel, the worst case for run-length coding
+    img = load_gray("lena.png", *THROUGHPUT_SIZE)
+    values, counts = run_lengths(img)
+    encoded = make_binary_rle_arrays(values, counts, *img.shape)
+    megabytes = len(encoded) / 1e6
+
+    encode_ms = best_ms(lambda: make_binary_rle_arrays(values, counts, *img.shape))
+    decode_ms = best_ms(lambda: parse_binary_rle(encoded))
+    print(f"{megabytes:.1f} MB run stream: encode {megabytes / encode_ms * 1000:.0f} MB/s, "
+          f"decode {megabytes / decode_ms * 1000:.0f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Run lengths: the original pixel-by-pixel loop against run boundaries found in one comparison
+import numpy as np
+
+from common import best_ms, load_gray
+from image import Image
+
+SIZE = (2000, 1500)
+IMAGES = ["circles_eggs.bmp", "lena.png"]
+
+
+def legacy_rle_encode(img: np.ndarray) -> list[tuple[int, int]]:
+    result = []
+    flat_img = list(img.flat)
+    curr_pix = flat_img[0]
+    curr_count = 0
+
+    for pixel in flat_img:
+        if pixel == curr_pix:
+            curr_count += 1
+        else:
+            result.append((curr_pix, curr_count))
+            curr_pix = pixel
+            curr_count = 1
+
+    result.append((curr_pix, curr_count))
+    return result
+
+
+def main():
+    for name in IMAGES:
+        image = Image.from_numpy(load_gray(name, *SIZE), name)
+        runs = image.rle_encode_img()
+        assert legacy_rle_encode(image.img) == runs
+
+        legacy = best_ms(lambda: legacy_rle_encode(image.img), 1)
+        current = best_ms(image.rle_encode_arrays)
+        print(f"{name:>18} {SIZE[0]}x{SIZE[1]}, {len(runs)} runs: legacy {legacy:8.1f} ms, "
+              f"vectorized {current:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_IMAGES_DIR = os.path.join(REPO_DIR, "test_images")
+
+# The benchmarks import the application modules from the repository root
+sys.path.insert(0, REPO_DIR)
+
+
+def best_ms(f, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def load_gray(name: str, width: int | None = None, height: int | None = None) -> np.ndarray:
+    img = cv.imread(os.path.join(TEST_IMAGES_DIR, name), cv.IMREAD_GRAYSCALE)
+    if width is not None:
+        img = cv.resize(img, (width, height if height is not None else width), interpolation=cv.INTER_LINEAR)
+    return img
+
+
+def random_gray(width: int, height: int | None = None, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (height or width, width), dtype=np.uint8)
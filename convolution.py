@@ -0,0 +1,221 @@
+from enum import Enum
+from typing import Sequence
+
+import cv2 as cv
+import numpy as np
+
+from utils import convolve_filters
+
+# A kernel counts as rank-1 when its second singular value vanishes next to the first
+SEPARABLE_TOLERANCE = 1e-6
+
+# filter2D convolves in the frequency domain (a block DFT) once the kernel area reaches this many taps,
+# 8-bit to 8-bit and float to float filtering keep their vectorized direct loop longer
+DFT_MIN_AREA_VECTORIZED = 130
+DFT_MIN_AREA = 50
+
+# Per-pixel costs in milliseconds per megapixel. 8U and 64F are filtered from 8-bit input, 32F from 32F input,
+# as the stages of a filter chain are; 64F from 64F input measured the same as from 8-bit input.
+DIRECT_TAP_COST = {cv.CV_8U: 0.11, cv.CV_32F: 0.09, cv.CV_64F: 0.4}
+SEPARABLE_BASE_COST = 1.0
+SEPARABLE_TAP_COST = {cv.CV_8U: 0.25, cv.CV_32F: 0.25, cv.CV_64F: 0.4}
+DFT_COST = {cv.CV_8U: 10.0, cv.CV_32F: 10.0, cv.CV_64F: 15.0}
+CONVERSION_COST = 0.8
+
+# Filter chains run stage by stage in float, then convert to the requested depth. Float32 is plenty for 8-bit
+# results, float64 results are chained in float64 so that no precision is lost between the stages.
+CHAIN_DEPTH = cv.CV_32F
+
+# Reflected borders commute with kernels that are mirror-symmetric both ways, so a chain of those filtered stage by
+# stage matches the composite pass everywhere. Any other border or kernel makes the stages disagree near the edges.
+SYMMETRIC_BORDERS = (cv.BORDER_REFLECT, cv.BORDER_REFLECT_101)
+
+# How far the result of a sequential chain may stray from the single composite pass at the image borders
+BORDER_TOLERANCE_8U = 1.0
+BORDER_TOLERANCE_RELATIVE = 1e-4
+
+
+class ConvolutionPath(Enum):
+    DIRECT = "DIRECT"
+    SEPARABLE = "SEPARABLE"
+    FFT = "FFT"
+
+
+class ConvolutionPlan:
+    def __init__(self, path: ConvolutionPath, reason: str, kernel: np.ndarray, cost: float,
+                 column: np.ndarray | None = None, row: np.ndarray | None = None):
+        self.path = path
+        self.reason = reason
+        self.kernel = kernel
+        self.cost = cost
+        self.column = column
+        self.row = row
+
+    def __str__(self):
+        return f"{self.path.name} ({self.reason})"
+
+
+def separable_factors(kernel: np.ndarray) -> tuple[np.ndarray, np.ndarray] | None:
+    u, s, vt = np.linalg.svd(kernel)
+    if s[0] == 0 or (s.size > 1 and s[1] > SEPARABLE_TOLERANCE * s[0]):
+        return None
+
+    # kernel = column * row, the singular value split evenly between the two
+    scale = np.sqrt(s[0])
+    return u[:, 0] * scale, vt[0] * scale
+
+
+def _dft_min_area(ddepth: int) -> int:
+    return DFT_MIN_AREA_VECTORIZED if ddepth in (cv.CV_8U, cv.CV_32F) else DFT_MIN_AREA
+
+
+def plan_convolution(kernel: np.ndarray, ddepth: int) -> ConvolutionPlan:
+    kernel = np.asarray(kernel, dtype=np.float64)
+    height, width = kernel.shape
+    area = height * width
+
+    min_area = _dft_min_area(ddepth)
+    uses_dft = area >= min_area
+    dense_cost = DFT_COST[ddepth] if uses_dft else area * DIRECT_TAP_COST[ddepth]
+    dense_path = ConvolutionPath.FFT if uses_dft else ConvolutionPath.DIRECT
+    dense_reason = f"{area} taps {'reach' if uses_dft else 'stay below'} the DFT threshold of {min_area}"
+
+    factors = separable_factors(kernel)
+    if factors is None:
+        return ConvolutionPlan(dense_path, f"not separable, {dense_reason}", kernel, dense_cost)
+
+    separable_cost = SEPARABLE_BASE_COST + (width + height) * SEPARABLE_TAP_COST[ddepth]
+    if separable_cost >= dense_cost:
+        return ConvolutionPlan(dense_path, f"rank-1, but {dense_reason} and one pass is cheaper", kernel, dense_cost)
+
+    column, row = factors
+    return ConvolutionPlan(ConvolutionPath.SEPARABLE, f"rank-1, two 1-D passes of {height} and {width} taps",
+                           kernel, separable_cost, column, row)
+
+
+def apply_convolution_plan(img: np.ndarray, plan: ConvolutionPlan, ddepth: int, border_type: int) -> np.ndarray:
+    match plan.path:
+        case ConvolutionPath.SEPARABLE:
+            return cv.sepFilter2D(img, ddepth, plan.row, plan.column, borderType=border_type)
+        case ConvolutionPath.DIRECT | ConvolutionPath.FFT:
+            # filter2D picks its direct or DFT implementation by the same kernel area the plan was made with
+            return cv.filter2D(img, ddepth, plan.kernel, borderType=border_type)
+
+    raise NotImplementedError(f"Unknown convolution path: {plan.path}")
+
+
+def convolve(img: np.ndarray, kernel: np.ndarray, ddepth: int, border_type: int) -> tuple[np.ndarray, ConvolutionPlan]:
+    plan = plan_convolution(kernel, ddepth)
+    return apply_convolution_plan(img, plan, ddepth, border_type), plan
+
+
+class FilterChainPlan:
+    def __init__(self, stages: list[ConvolutionPlan], reason: str, sequential: bool):
+        self.stages = stages
+        self.reason = reason
+        self.sequential = sequential
+
+    @property
+    def cost(self) -> float:
+        conversions = 2 * CONVERSION_COST if self.sequential else 0
+        return sum(stage.cost for stage in self.stages) + conversions
+
+    def __str__(self):
+        passes = " then ".join(stage.path.name for stage in self.stages)
+        return f"{passes} ({self.reason})"
+
+
+def chain_depth(ddepth: int) -> int:
+    return cv.CV_64F if ddepth == cv.CV_64F else CHAIN_DEPTH
+
+
+def composite_kernel(filters: Sequence[np.ndarray]) -> np.ndarray:
+    kernel = np.asarray(filters[0], dtype=np.float64)
+    for f in filters[1:]:
+        kernel = convolve_filters(kernel, f)
+    return kernel
+
+
+def borders_agree(filters: Sequence[np.ndarray], border_type: int) -> bool:
+    if border_type not in SYMMETRIC_BORDERS:
+        return False
+    filters = [np.asarray(f) for f in filters]
+    return all(f.shape[0] % 2 == 1 and f.shape[1] % 2 == 1
+               and np.array_equal(f, f[::-1]) and np.array_equal(f, f[:, ::-1]) for f in filters)
+
+
+def plan_filter_chain(filters: Sequence[np.ndarray], ddepth: int, border_type: int, normalizer: float = 1,
+                      exact_borders: bool = True) -> FilterChainPlan:
+    # Filtering with each filter in turn equals one pass with their composite everywhere but at the borders,
+    # where every stage pads its own input. Unless exact_borders is off, the cheaper sequential passes are only
+    # taken where the border makes them agree with the composite.
+    filters = [np.asarray(f, dtype=np.float64) for f in filters]
+    filters[-1] = filters[-1] / normalizer
+
+    single = plan_convolution(composite_kernel(filters), ddepth)
+    stages = [plan_convolution(f, chain_depth(ddepth)) for f in filters]
+    sequential = FilterChainPlan(stages, "", True)
+
+    if sequential.cost < single.cost:
+        if exact_borders and not borders_agree(filters, border_type):
+            return FilterChainPlan([single], f"composite kernel, sequential passes would change the borders, "
+                                             f"{single.reason}", False)
+        sequential.reason = f"~{sequential.cost:.1f} against ~{single.cost:.1f} for the composite kernel"
+        return sequential
+    return FilterChainPlan([single], f"composite kernel, {single.reason}", False)
+
+
+def apply_filter_chain_plan(img: np.ndarray, plan: FilterChainPlan, ddepth: int, border_type: int) -> np.ndarray:
+    if not plan.sequential:
+        return apply_convolution_plan(img, plan.stages[0], ddepth, border_type)
+
+    depth = chain_depth(ddepth)
+    result = cv.add(img, 0.0, dtype=depth)
+    for stage in plan.stages:
+        result = apply_convolution_plan(result, stage, depth, border_type)
+    return cv.add(result, 0.0, dtype=ddepth)
+
+
+def border_disagreement(img: np.ndarray, plan: FilterChainPlan, ddepth: int, border_type: int) -> float:
+    composite = composite_kernel([stage.kernel for stage in plan.stages])
+    reach = max(composite.shape) // 2
+    if not plan.sequential or reach == 0:
+        return 0.0
+
+    # Only pixels within the composite's reach of an edge can differ. Strips twice that deep hold every pixel
+    # those results depend on, so the comparison never touches the interior.
+    depth = 2 * reach
+    single = FilterChainPlan([plan_convolution(composite, ddepth)], "", False)
+
+    disagreement = 0.0
+    for strip, edge in [(img[:depth], np.s_[:reach]), (img[-depth:], np.s_[-reach:]),
+                        (img[:, :depth], np.s_[:, :reach]), (img[:, -depth:], np.s_[:, -reach:])]:
+        expected = apply_filter_chain_plan(strip, single, ddepth, border_type)[edge]
+        actual = apply_filter_chain_plan(strip, plan, ddepth, border_type)[edge]
+        disagreement = max(disagreement, float(np.abs(actual.astype(np.float64) - expected).max(initial=0)))
+    return disagreement
+
+
+def border_tolerance(img: np.ndarray, ddepth: int) -> float:
+    if ddepth == cv.CV_8U:
+        return BORDER_TOLERANCE_8U
+    return BORDER_TOLERANCE_RELATIVE * max(1.0, float(np.abs(img).max(initial=0)))
+
+
+def filter_chain(img: np.ndarray,
+                 filters: Sequence[np.ndarray],
+                 ddepth: int,
+                 border_type: int,
+                 normalizer: float = 1,
+                 verify_borders: bool = False) -> tuple[np.ndarray, FilterChainPlan]:
+    # Verification lets the sequential passes run under any border, as long as they stay within the tolerance
+    plan = plan_filter_chain(filters, ddepth, border_type, normalizer, exact_borders=not verify_borders)
+
+    if verify_borders and plan.sequential and not borders_agree(filters, border_type):
+        disagreement = border_disagreement(img, plan, ddepth, border_type)
+        if disagreement > border_tolerance(img, ddepth):
+            single = plan_convolution(composite_kernel([stage.kernel for stage in plan.stages]), ddepth)
+            plan = FilterChainPlan([single], f"sequential passes differ by {disagreement:.3g} at the borders, "
+                                             f"composite kernel, {single.reason}", False)
+
+    return apply_filter_chain_plan(img, plan, ddepth, border_type), plan
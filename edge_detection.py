@@ -0,0 +1,69 @@
+import cv2 as cv
+import numpy as np
+
+from masks.prewitt_masks import Prewitt
+
+# The compass directions in the order of their direction labels
+COMPASS_DIRECTIONS = [Prewitt.N, Prewitt.NE, Prewitt.E, Prewitt.SE, Prewitt.S, Prewitt.SW, Prewitt.W, Prewitt.NW]
+
+# (row, column) of the ring around a 3x3 window's centre, clockwise from the top, so that ring position k lies
+# in direction k. Every Prewitt compass mask adds the arc of 3 around position k + 4 and subtracts the arc around k.
+RING_OFFSETS = [(0, 1), (0, 2), (1, 2), (2, 2), (2, 1), (2, 0), (1, 0), (0, 0)]
+COMPASS_DEPTH = cv.CV_32F
+
+
+def compass_prewitt(img: np.ndarray,
+                    border_type: int,
+                    response: np.ndarray | None = None,
+                    direction: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    height, width = img.shape[:2]
+    if response is None:
+        response = np.empty((height, width), dtype=np.float32)
+    if direction is None:
+        direction = np.empty((height, width), dtype=np.uint8)
+
+    padded = cv.copyMakeBorder(img.reshape(height, width), 1, 1, 1, 1, borderType=border_type)
+    padded = cv.add(padded, 0.0, dtype=COMPASS_DEPTH)
+    ring = [padded[row:row + height, column:column + width] for row, column in RING_OFFSETS]
+
+    # R(k) = S(k + 4) - S(k) for arc sums S, and R(k + 4) = -R(k): the four masks N to SE are enough,
+    # each from the previous one by moving both arcs a step, which swaps two pixels on either side
+    current = np.empty((height, width), dtype=np.float32)
+    cv.add(ring[3], ring[4], dst=current)
+    cv.add(current, ring[5], dst=current)
+    cv.subtract(current, ring[7], dst=current)
+    cv.subtract(current, ring[0], dst=current)
+    cv.subtract(current, ring[1], dst=current)
+
+    # N to SE come before S to NW, so the largest positive R(k) and the most negative one are tracked apart,
+    # each keeping the first of its ties, and the positive one wins a tie between them. Either tracker only ever
+    # moves to a later direction, so a masked maximum records it without boolean indexing.
+    highest = current.copy()
+    lowest = current.copy()
+    highest_direction = np.zeros((height, width), dtype=np.uint8)
+    lowest_direction = np.full((height, width), 4, dtype=np.uint8)
+    mask = np.empty((height, width), dtype=np.uint8)
+
+    for k in range(1, 4):
+        cv.add(current, ring[(k + 5) % 8], dst=current)
+        cv.subtract(current, ring[(k + 2) % 8], dst=current)
+        cv.subtract(current, ring[(k + 1) % 8], dst=current)
+        cv.add(current, ring[(k - 2) % 8], dst=current)
+
+        cv.compare(current, highest, cv.CMP_GT, dst=mask)
+        cv.bitwise_and(mask, k, dst=mask)
+        cv.max(highest_direction, mask, dst=highest_direction)
+        cv.max(current, highest, dst=highest)
+
+        cv.compare(current, lowest, cv.CMP_LT, dst=mask)
+        cv.bitwise_and(mask, k + 4, dst=mask)
+        cv.max(lowest_direction, mask, dst=lowest_direction)
+        cv.min(current, lowest, dst=lowest)
+
+    cv.subtract(0.0, lowest, dst=lowest)
+    cv.compare(highest, lowest, cv.CMP_GE, dst=mask)
+    np.copyto(direction, lowest_direction)
+    cv.copyTo(highest_direction, mask, dst=direction)
+    cv.max(highest, lowest, dst=response)
+
+    return response, direction
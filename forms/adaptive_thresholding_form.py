@@ -3,6 +3,10 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QFormLayout, QSp
                              QDialog, QDialogButtonBox, QDoubleSpinBox, QComboBox, QCheckBox)
 
 from error_box import ErrorBox
+from forms.form_widgets.array_preview import ArrayPreview
+
+# cv.adaptiveThreshold compares 8-bit differences, a C beyond a full grey range changes nothing
+MAX_C = 255
 
 
 class AdaptiveThresholdingForm(QDialog):
@@ -12,7 +16,7 @@ class AdaptiveThresholdingForm(QDialog):
         self.gaussian_mode = False
         self.c = 2.0
         self.inv = False
-
+        self.image = parent.image if parent is not None else None
 
         title = "Adaptive Thresholding"
         if parent is not None:
@@ -25,6 +29,10 @@ class AdaptiveThresholdingForm(QDialog):
         main_layout = QVBoxLayout()
         self.setLayout(main_layout)
 
+        self.preview = ArrayPreview()
+        if self.image is not None:
+            main_layout.addWidget(self.preview)
+
         form_widget = QWidget()
         form_layout = QFormLayout()
         form_widget.setLayout(form_layout)
@@ -44,6 +52,7 @@ class AdaptiveThresholdingForm(QDialog):
         form_layout.addRow("Gaussian Mode", self.gau_checkbox)
 
         self.c_spin = QDoubleSpinBox()
+        self.c_spin.setRange(-MAX_C, MAX_C)
         self.c_spin.setValue(self.c)
         self.c_spin.setSingleStep(0.1)
         self.c_spin.valueChanged.connect(self.c_value_changed)
@@ -62,7 +71,10 @@ class AdaptiveThresholdingForm(QDialog):
         self.button_box.rejected.connect(self.reject)
         main_layout.addWidget(self.button_box)
 
-        self.setFixedSize(self.size().width() // 2, self.size().height() // 3)
+        if self.image is None:
+            self.setFixedSize(self.size().width() // 2, self.size().height() // 3)
+
+        self.update_preview()
 
     @property
     def is_data_valid(self):
@@ -71,15 +83,30 @@ class AdaptiveThresholdingForm(QDialog):
 
     def block_size_value_changed(self, val):
         self.block_size = val
+        self.update_preview()
 
     def gau_toggled(self, val):
         self.gaussian_mode = self.gau_checkbox.isChecked()
+        self.update_preview()
 
     def c_value_changed(self, val):
         self.c = val
+        self.update_preview()
 
     def inv_toggled(self, val):
         self.inv = self.inv_checkbox.isChecked()
+        self.update_preview()
+
+    def update_preview(self):
+        if self.image is None or not self.is_data_valid:
+            return
+
+        try:
+            # Local means are cached by the session, scrolling C only repeats the final comparison
+            session = self.image.adaptive_threshold_session()
+            self.preview.show_array(session.threshold(self.block_size, self.c, self.gaussian_mode, self.inv))
+        except Exception as error:
+            ErrorBox(error)
 
     def accept(self):
         if self.is_data_valid: super().accept()
@@ -1,6 +1,13 @@
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QFormLayout, QSpinBox,
-                             QDialog, QDialogButtonBox, QDoubleSpinBox, QComboBox, QCheckBox)
+                             QDialog, QDialogButtonBox, QDoubleSpinBox, QComboBox, QCheckBox, QPushButton)
+
+from error_box import ErrorBox
+from forms.form_widgets.array_preview import ArrayPreview
+
+# Largest L1 magnitude of a 3x3 Sobel gradient over 8-bit pixels
+MAX_THRESHOLD = 2 * 4 * 255
+MAX_BLUR_SIZE = 31
 
 
 class CannyForm(QDialog):
@@ -8,6 +15,8 @@ class CannyForm(QDialog):
         super().__init__()
         self.threshold1 = 100
         self.threshold2 = 200
+        self.blur_size = 0
+        self.image = parent.image if parent is not None else None
 
         title = "Canny"
         if parent is not None:
@@ -20,6 +29,10 @@ class CannyForm(QDialog):
         main_layout = QVBoxLayout()
         self.setLayout(main_layout)
 
+        self.preview = ArrayPreview()
+        if self.image is not None:
+            main_layout.addWidget(self.preview)
+
         form_widget = QWidget()
         form_layout = QFormLayout()
         form_widget.setLayout(form_layout)
@@ -27,48 +40,91 @@ class CannyForm(QDialog):
 
         self.th1_spin_box = QSpinBox()
         self.th1_spin_box.setMinimum(0)
-        self.th1_spin_box.setMaximum(255)
+        self.th1_spin_box.setMaximum(MAX_THRESHOLD)
         self.th1_spin_box.setValue(self.threshold1)
         self.th1_spin_box.valueChanged.connect(self.th1_value_changed)
         form_layout.addRow("Threshold 1", self.th1_spin_box)
 
         self.th2_spin_box = QSpinBox()
         self.th2_spin_box.setMinimum(0)
-        self.th2_spin_box.setMaximum(255)
+        self.th2_spin_box.setMaximum(MAX_THRESHOLD)
         self.th2_spin_box.setValue(self.threshold2)
         self.th2_spin_box.valueChanged.connect(self.th2_value_changed)
         form_layout.addRow("Threshold 2", self.th2_spin_box)
 
+        self.blur_spin_box = QSpinBox()
+        self.blur_spin_box.setMinimum(0)
+        self.blur_spin_box.setMaximum(MAX_BLUR_SIZE)
+        self.blur_spin_box.setSingleStep(2)
+        self.blur_spin_box.setSpecialValueText("None")
+        self.blur_spin_box.setValue(self.blur_size)
+        self.blur_spin_box.valueChanged.connect(self.blur_value_changed)
+        form_layout.addRow("Gaussian Blur", self.blur_spin_box)
+
+        self.auto_button = QPushButton()
+        self.auto_button.setText("Auto Thresholds")
+        self.auto_button.setEnabled(self.image is not None)
+        self.auto_button.clicked.connect(self.auto_thresholds)
+        form_layout.addRow("", self.auto_button)
+
         buttons = QDialogButtonBox.Ok | QDialogButtonBox.Cancel
         self.button_box = QDialogButtonBox(buttons)
         self.button_box.accepted.connect(self.accept)
         self.button_box.rejected.connect(self.reject)
         main_layout.addWidget(self.button_box)
 
-        self.setFixedSize(self.size().width() // 3, self.size().height() // 3 - 30)
+        self.update_preview()
 
     @property
     def is_data_valid(self):
         c1 = 0 <= self.threshold1 <= self.threshold2
-        c2 = 0 <= self.threshold2 <= 255
-        return c1 and c2
+        c2 = 0 <= self.threshold2 <= MAX_THRESHOLD
+        c3 = self.blur_size == 0 or self.blur_size % 2 == 1
+        return c1 and c2 and c3
 
     def th1_value_changed(self, val):
         self.threshold1 = val
+        self.update_preview()
 
     def th2_value_changed(self, val):
         self.threshold2 = val
+        self.update_preview()
+
+    def blur_value_changed(self, val):
+        # Gaussian kernels are odd, the step of 2 from "None" would land on even sizes
+        if val % 2 == 0 and val != 0:
+            self.blur_spin_box.setValue(val + 1 if val > self.blur_size else val - 1)
+            return
+        self.blur_size = val
+        self.update_preview()
+
+    def auto_thresholds(self):
+        try:
+            low, high = self.image.canny_session(self.blur_size).auto_thresholds()
+            # Threshold 2 first, so that the pair never passes through an invalid order
+            self.th2_spin_box.setValue(high)
+            self.th1_spin_box.setValue(low)
+        except Exception as error:
+            ErrorBox(error)
+
+    def update_preview(self):
+        if self.image is None or not self.is_data_valid:
+            return
+
+        try:
+            edges = self.image.canny_session(self.blur_size).edges(self.threshold1, self.threshold2)
+            self.preview.show_array(edges)
+        except Exception as error:
+            ErrorBox(error)
 
     def accept(self):
         if self.is_data_valid: super().accept()
-        else: print("Invalid data")
+        else: ErrorBox("Invalid data")
 
     @staticmethod
-    def show_dialog(parent=None) -> tuple[int, int] | None:
+    def show_dialog(parent=None) -> tuple[int, int, int] | None:
         cf = CannyForm(parent)
         cf.setModal(True)
         result = cf.exec()
-        return (cf.threshold1, cf.threshold2) \
+        return (cf.threshold1, cf.threshold2, cf.blur_size) \
             if result == QDialog.Accepted else None
-
-
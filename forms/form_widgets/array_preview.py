@@ -0,0 +1,26 @@
+import cv2 as cv
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QLabel
+
+MAX_SIZE = 320
+
+
+class ArrayPreview(QLabel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAlignment(Qt.AlignCenter)
+        self.setMinimumSize(MAX_SIZE, MAX_SIZE)
+
+    def show_array(self, arr: np.ndarray):
+        # Grayscale pixels, saturated to 8 bits and shrunk to fit; area averaging keeps thin lines visible as grey
+        if arr.dtype != np.uint8:
+            arr = cv.add(arr, 0.0, dtype=cv.CV_8U)
+        height, width = arr.shape[:2]
+        scale = min(MAX_SIZE / width, MAX_SIZE / height, 1)
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        preview = cv.resize(arr, size, interpolation=cv.INTER_AREA)
+
+        qt_image = QImage(preview, preview.shape[1], preview.shape[0], preview.strides[0], QImage.Format_Grayscale8)
+        self.setPixmap(QPixmap.fromImage(qt_image))
@@ -105,9 +105,8 @@ class GrabCutMaskForm(QDialog):
             ErrorBox("This is not a binary mask!")
         else:
             try:
-                self.mask = img.img
-                self.mask[self.mask == LMIN] = 0
-                self.mask[self.mask == LMAX] = 1
+                # A new 0/1 array, the mask image's own pixels may be shared with other images
+                self.mask = (img.img == LMAX).astype(np.uint8)
                 self.update_preview()
             except Exception as e:
                 ErrorBox(e)
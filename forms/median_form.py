@@ -31,6 +31,7 @@ class MedianForm(QDialog):
 
         self.size_spin_box = QSpinBox()
         self.size_spin_box.setMinimum(3)
+        self.size_spin_box.setMaximum(101)
         self.size_spin_box.setValue(self.size)
         self.size_spin_box.setSingleStep(2)
         self.size_spin_box.valueChanged.connect(self.size_value_changed)
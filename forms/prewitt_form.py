@@ -1,7 +1,7 @@
 import numpy as np
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QFormLayout, QDialog, QDialogButtonBox, QComboBox,
-                             QHBoxLayout, QDial, QLabel, QGraphicsView, QGraphicsScene)
+                             QHBoxLayout, QDial, QLabel, QGraphicsView, QGraphicsScene, QCheckBox)
 
 from error_box import ErrorBox
 from forms.form_widgets.np_tablewidget import NpTableWidget
@@ -20,6 +20,7 @@ class PrewittForm(QDialog):
         self.ddepth = self.ddepth_options[0]
         self.padding_options = [Padding.REPLICATE, Padding.ISOLATED, Padding.REFLECT]
         self.padding = self.padding_options[0]
+        self.compass = False
 
         title = "Prewitt"
         if parent is not None:
@@ -72,6 +73,11 @@ class PrewittForm(QDialog):
 
         form_layout.addRow("Direction", self.knob_box)
 
+        self.compass_checkbox = QCheckBox()
+        self.compass_checkbox.setChecked(self.compass)
+        self.compass_checkbox.stateChanged.connect(self.compass_checkbox_state_changed)
+        form_layout.addRow("All Directions", self.compass_checkbox)
+
         self.ddepth_combo_box = QComboBox()
         self.ddepth_combo_box.addItems(list(map(
             lambda item: item.name,
@@ -112,6 +118,11 @@ class PrewittForm(QDialog):
         self.direction_label.setText(new_filter.name)
         self.filter_table.data = self.filter_np
 
+    def compass_checkbox_state_changed(self, value):
+        self.compass = bool(value)
+        self.knob_box.setEnabled(not self.compass)
+        self.filter_table.setEnabled(not self.compass)
+
     def padding_idx_changed(self, idx):
         self.padding = self.padding_options[idx]
 
@@ -123,11 +134,11 @@ class PrewittForm(QDialog):
         else: ErrorBox("Invalid data")
 
     @staticmethod
-    def show_dialog(parent=None) -> tuple[np.ndarray, DesiredDepth, Padding] | None:
+    def show_dialog(parent=None) -> tuple[np.ndarray, DesiredDepth, Padding, bool] | None:
         pf = PrewittForm(parent)
         pf.setModal(True)
         result = pf.exec()
-        return (pf.filter_np, pf.ddepth, pf.padding) \
+        return (pf.filter_np, pf.ddepth, pf.padding, pf.compass) \
             if result == QDialog.Accepted else None
 
 
@@ -0,0 +1,129 @@
+from enum import Enum
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QFormLayout, QSpinBox,
+                             QDialog, QDialogButtonBox, QComboBox, QDoubleSpinBox)
+
+from error_box import ErrorBox
+from image import Padding
+
+
+class Rank(Enum):
+    MIN = 0.0
+    MAX = 100.0
+    PERCENTILE = None
+
+
+class RankFilterForm(QDialog):
+    def __init__(self, parent: QMainWindow | None = None):
+        super().__init__()
+        self.window_width = 3
+        self.window_height = 3
+        self.rank = Rank.MIN
+        self.percentile = 50.0
+        self.padding = Padding.REPLICATE
+        self.rank_options = [Rank.MIN, Rank.MAX, Rank.PERCENTILE]
+        self.padding_options = [Padding.REPLICATE, Padding.ISOLATED, Padding.REFLECT]
+
+        title = "Rank Filter"
+        if parent is not None:
+            title = f"{parent.image.name if parent.image is not None else parent.windowTitle()} | Rank Filter"
+
+        self.setWindowTitle(title)
+
+        self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
+
+        main_layout = QVBoxLayout()
+        self.setLayout(main_layout)
+
+        form_widget = QWidget()
+        form_layout = QFormLayout()
+        form_widget.setLayout(form_layout)
+        main_layout.addWidget(form_widget)
+
+        self.rank_combo_box = QComboBox()
+        self.rank_combo_box.addItems(list(map(
+            lambda item: item.name,
+            self.rank_options
+        )))
+        self.rank_combo_box.currentIndexChanged.connect(self.rank_idx_changed)
+        form_layout.addRow("Rank", self.rank_combo_box)
+
+        self.percentile_spin_box = QDoubleSpinBox()
+        self.percentile_spin_box.setMinimum(0)
+        self.percentile_spin_box.setMaximum(100)
+        self.percentile_spin_box.setDecimals(1)
+        self.percentile_spin_box.setSuffix(" %")
+        self.percentile_spin_box.setValue(self.percentile)
+        self.percentile_spin_box.setEnabled(False)
+        self.percentile_spin_box.valueChanged.connect(self.percentile_value_changed)
+        form_layout.addRow("Percentile", self.percentile_spin_box)
+
+        self.width_spin_box = QSpinBox()
+        self.width_spin_box.setMinimum(1)
+        self.width_spin_box.setMaximum(201)
+        self.width_spin_box.setValue(self.window_width)
+        self.width_spin_box.setSingleStep(2)
+        self.width_spin_box.valueChanged.connect(self.width_value_changed)
+        form_layout.addRow("Width", self.width_spin_box)
+
+        self.height_spin_box = QSpinBox()
+        self.height_spin_box.setMinimum(1)
+        self.height_spin_box.setMaximum(201)
+        self.height_spin_box.setValue(self.window_height)
+        self.height_spin_box.setSingleStep(2)
+        self.height_spin_box.valueChanged.connect(self.height_value_changed)
+        form_layout.addRow("Height", self.height_spin_box)
+
+        self.padding_combo_box = QComboBox()
+        self.padding_combo_box.addItems(list(map(
+            lambda item: item.name,
+            self.padding_options
+        )))
+        self.padding_combo_box.currentIndexChanged.connect(self.padding_idx_changed)
+        form_layout.addRow("Padding", self.padding_combo_box)
+
+        buttons = QDialogButtonBox.Ok | QDialogButtonBox.Cancel
+        self.button_box = QDialogButtonBox(buttons)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        main_layout.addWidget(self.button_box)
+
+        self.setFixedSize(super().size().width() // 3, super().size().height() // 3 + 30)
+
+    @property
+    def is_data_valid(self):
+        return self.window_width % 2 == 1 and self.window_height % 2 == 1 and 0 <= self.percentile <= 100
+
+    @property
+    def selected_percentile(self) -> float:
+        return self.percentile if self.rank == Rank.PERCENTILE else self.rank.value
+
+    def rank_idx_changed(self, idx):
+        self.rank = self.rank_options[idx]
+        self.percentile_spin_box.setEnabled(self.rank == Rank.PERCENTILE)
+
+    def percentile_value_changed(self, val):
+        self.percentile = val
+
+    def width_value_changed(self, val):
+        self.window_width = val
+
+    def height_value_changed(self, val):
+        self.window_height = val
+
+    def padding_idx_changed(self, idx):
+        self.padding = self.padding_options[idx]
+
+    def accept(self):
+        if self.is_data_valid: super().accept()
+        else: ErrorBox("Invalid data")
+
+    @staticmethod
+    def show_dialog(parent=None) -> tuple[int, int, float, Padding] | None:
+        rf = RankFilterForm(parent)
+        rf.setModal(True)
+        result = rf.exec()
+        if result != QDialog.Accepted:
+            return None
+        return rf.window_width, rf.window_height, rf.selected_percentile, rf.padding
@@ -0,0 +1,126 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QFormLayout, QSpinBox,
+                             QDialog, QDialogButtonBox, QComboBox)
+
+from error_box import ErrorBox
+from image import Padding, StructuringElementShape
+from skeletonization import SkeletonMethod
+
+
+class SkeletonizationForm(QDialog):
+    def __init__(self, parent: QMainWindow | None = None):
+        super().__init__()
+        op_name = "Skeletonization"
+        self.method = SkeletonMethod.MORPHOLOGICAL
+        self.method_options = [SkeletonMethod.MORPHOLOGICAL, SkeletonMethod.ZHANG_SUEN]
+        self.max_iterations = 0
+        self.kernel_shape = StructuringElementShape.RECTANGLE
+        self.kernel_shape_options = [StructuringElementShape.RECTANGLE,
+                                     StructuringElementShape.RHOMBUS,
+                                     StructuringElementShape.ELLIPSE,
+                                     StructuringElementShape.CROSS]
+        self.size = 3
+        self.padding = Padding.REPLICATE
+        self.padding_options = [Padding.REPLICATE, Padding.ISOLATED, Padding.REFLECT]
+
+        title = op_name
+        if parent is not None:
+            title = f"{parent.image.name if parent.image is not None else parent.windowTitle()} | {op_name}"
+
+        self.setWindowTitle(title)
+
+        self.setWindowFlags(self.windowFlags() & ~Qt.WindowContextHelpButtonHint)
+
+        main_layout = QVBoxLayout()
+        self.setLayout(main_layout)
+
+        form_widget = QWidget()
+        form_layout = QFormLayout()
+        form_widget.setLayout(form_layout)
+        main_layout.addWidget(form_widget)
+
+        self.method_combo_box = QComboBox()
+        self.method_combo_box.addItems(list(map(
+            lambda item: item.name,
+            self.method_options
+        )))
+        self.method_combo_box.currentIndexChanged.connect(self.method_idx_changed)
+        form_layout.addRow("Method", self.method_combo_box)
+
+        self.kernel_shape_combo_box = QComboBox()
+        self.kernel_shape_combo_box.addItems(list(map(
+            lambda item: item.name,
+            self.kernel_shape_options
+        )))
+        self.kernel_shape_combo_box.currentIndexChanged.connect(self.kernel_shape_idx_changed)
+        form_layout.addRow("Structuring Element: ", self.kernel_shape_combo_box)
+
+        self.size_spin_box = QSpinBox()
+        self.size_spin_box.setMinimum(3)
+        self.size_spin_box.setValue(self.size)
+        self.size_spin_box.setSingleStep(2)
+        self.size_spin_box.valueChanged.connect(self.size_value_changed)
+
+        form_layout.addRow("Size", self.size_spin_box)
+
+        self.padding_combo_box = QComboBox()
+        self.padding_combo_box.addItems(list(map(
+            lambda item: item.name,
+            self.padding_options
+        )))
+        self.padding_combo_box.currentIndexChanged.connect(self.padding_idx_changed)
+        form_layout.addRow("Padding", self.padding_combo_box)
+
+        self.max_iterations_spin_box = QSpinBox()
+        self.max_iterations_spin_box.setMinimum(0)
+        self.max_iterations_spin_box.setMaximum(100000)
+        self.max_iterations_spin_box.setSpecialValueText("Unlimited")
+        self.max_iterations_spin_box.setValue(self.max_iterations)
+        self.max_iterations_spin_box.valueChanged.connect(self.max_iterations_value_changed)
+        form_layout.addRow("Max Iterations", self.max_iterations_spin_box)
+
+        buttons = QDialogButtonBox.Ok | QDialogButtonBox.Cancel
+        self.button_box = QDialogButtonBox(buttons)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        main_layout.addWidget(self.button_box)
+
+        self.setFixedSize(super().size().width() // 3, super().size().height() // 3 + 35)
+
+    @property
+    def is_data_valid(self):
+        return self.size % 2 == 1 and self.size > 2
+
+    def size_value_changed(self, val):
+        self.size = val
+
+    def padding_idx_changed(self, idx):
+        self.padding = self.padding_options[idx]
+
+    def kernel_shape_idx_changed(self, idx):
+        self.kernel_shape = self.kernel_shape_options[idx]
+
+    def method_idx_changed(self, idx):
+        self.method = self.method_options[idx]
+        # Thinning always looks at the 8-neighbourhood, with background outside the image
+        thinning = self.method == SkeletonMethod.ZHANG_SUEN
+        self.kernel_shape_combo_box.setEnabled(not thinning)
+        self.size_spin_box.setEnabled(not thinning)
+        self.padding_combo_box.setEnabled(not thinning)
+
+    def max_iterations_value_changed(self, val):
+        self.max_iterations = val
+
+    def accept(self):
+        if self.is_data_valid: super().accept()
+        else: ErrorBox("Invalid data")
+
+    @staticmethod
+    def show_dialog(parent=None) -> tuple | None:
+        sf = SkeletonizationForm(parent)
+        sf.setModal(True)
+        result = sf.exec()
+        if result != QDialog.Accepted:
+            return None
+        max_iterations = sf.max_iterations if sf.max_iterations > 0 else None
+        return sf.kernel_shape, sf.size, sf.padding, sf.method, max_iterations
@@ -3,6 +3,7 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QFormLayout, QSp
                              QDialog, QDialogButtonBox, QDoubleSpinBox, QComboBox, QCheckBox)
 
 from error_box import ErrorBox
+from gradients import SobelOutput
 from image import DesiredDepth, Padding
 
 
@@ -14,6 +15,9 @@ class SobelForm(QDialog):
         self.ddepth_options = [DesiredDepth.U8, DesiredDepth.F64]
         self.padding = Padding.REPLICATE
         self.padding_options = [Padding.REPLICATE, Padding.ISOLATED, Padding.REFLECT]
+        self.output = SobelOutput.BLENDED
+        self.output_options = [SobelOutput.BLENDED, SobelOutput.MAGNITUDE_L1, SobelOutput.MAGNITUDE_L2,
+                               SobelOutput.ORIENTATION]
 
         title = "Sobel"
         if parent is not None:
@@ -54,20 +58,29 @@ class SobelForm(QDialog):
         self.padding_combo_box.currentIndexChanged.connect(self.padding_idx_changed)
         form_layout.addRow("Padding", self.padding_combo_box)
 
+        self.output_combo_box = QComboBox()
+        self.output_combo_box.addItems(list(map(
+            lambda item: item.name,
+            self.output_options
+        )))
+        self.output_combo_box.currentIndexChanged.connect(self.output_idx_changed)
+        form_layout.addRow("Output", self.output_combo_box)
+
         buttons = QDialogButtonBox.Ok | QDialogButtonBox.Cancel
         self.button_box = QDialogButtonBox(buttons)
         self.button_box.accepted.connect(self.accept)
         self.button_box.rejected.connect(self.reject)
         main_layout.addWidget(self.button_box)
 
-        self.setFixedSize(super().size().width() // 3, super().size().height() // 3 - 15)
+        self.setFixedSize(super().size().width() // 3, super().size().height() // 3 + 15)
 
     @property
     def is_data_valid(self):
         c1 = self.size % 2 == 1 and self.size > 2
         c2 = self.ddepth in self.ddepth_options
         c3 = self.padding in self.padding_options
-        return c1 and c2 and c3
+        c4 = self.output in self.output_options
+        return c1 and c2 and c3 and c4
 
     def size_value_changed(self, val):
         self.size = val
@@ -78,16 +91,19 @@ class SobelForm(QDialog):
     def ddepth_idx_changed(self, idx):
         self.ddepth = self.ddepth_options[idx]
 
+    def output_idx_changed(self, idx):
+        self.output = self.output_options[idx]
+
     def accept(self):
         if self.is_data_valid: super().accept()
         else: ErrorBox("Invalid data")
 
     @staticmethod
-    def show_dialog(parent=None) -> tuple[int, DesiredDepth, Padding] | None:
+    def show_dialog(parent=None) -> tuple[int, DesiredDepth, Padding, SobelOutput] | None:
         sf = SobelForm(parent)
         sf.setModal(True)
         result = sf.exec()
-        return (sf.size, sf.ddepth, sf.padding) \
+        return (sf.size, sf.ddepth, sf.padding, sf.output) \
             if result == QDialog.Accepted else None
 
 
@@ -7,6 +7,7 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QFormLayout, QSp
 from error_box import ErrorBox
 from forms.form_widgets.np_tablewidget import NpTableWidget
 from image import DesiredDepth, Padding
+from convolution import plan_filter_chain
 from utils import convolve_filters
 
 
@@ -24,6 +25,7 @@ class TwoStageFilterForm(QDialog):
         self.padding_options = [Padding.REPLICATE, Padding.ISOLATED, Padding.REFLECT]
 
         self.should_normalize = True
+        self.should_verify_borders = False
 
         title = "Two Stage Filter"
         if parent is not None:
@@ -94,6 +96,11 @@ class TwoStageFilterForm(QDialog):
         self.outfilter_table = NpTableWidget(self.output)
         outfilter_layout.addWidget(self.outfilter_table)
 
+        self.plan_label = QLabel()
+        self.plan_label.setAlignment(Qt.AlignCenter)
+        self.plan_label.setWordWrap(True)
+        outfilter_layout.addWidget(self.plan_label)
+
         form_widget = QWidget()
         form_layout = QFormLayout()
         form_widget.setLayout(form_layout)
@@ -105,6 +112,11 @@ class TwoStageFilterForm(QDialog):
         self.normalize_checkbox.stateChanged.connect(self.normalize_checkbox_state_changed)
         form_layout.addRow("Normalize", self.normalize_checkbox)
 
+        self.verify_borders_checkbox = QCheckBox()
+        self.verify_borders_checkbox.setChecked(self.should_verify_borders)
+        self.verify_borders_checkbox.stateChanged.connect(self.verify_borders_checkbox_state_changed)
+        form_layout.addRow("Verify Borders", self.verify_borders_checkbox)
+
         self.ddepth_combo_box = QComboBox()
         self.ddepth_combo_box.addItems(list(map(
             lambda item: item.name,
@@ -132,9 +144,11 @@ class TwoStageFilterForm(QDialog):
 
     def padding_idx_changed(self, idx):
         self.padding = self.padding_options[idx]
+        self.update_plan_label()
 
     def ddepth_idx_changed(self, idx):
         self.ddepth = self.ddepth_options[idx]
+        self.update_plan_label()
 
     def update_filters(self):
         self.filter1 = self.filter1_table.extract_numpy()
@@ -144,10 +158,24 @@ class TwoStageFilterForm(QDialog):
     def normalize_checkbox_state_changed(self, value):
         bv = bool(value)
         self.should_normalize = bv
+        self.update_plan_label()
+
+    def verify_borders_checkbox_state_changed(self, value):
+        self.should_verify_borders = bool(value)
+        self.update_plan_label()
 
     def update_outfilter(self):
         self.update_filters()
         self.outfilter_table.data = self.output
+        self.update_plan_label()
+
+    def update_plan_label(self):
+        # Planned from the tables as they are now, edited since the last preview or not
+        filters = [self.filter1_table.extract_numpy(), self.filter2_table.extract_numpy()]
+        normalizer = max(convolve_filters(*filters).sum(), 1) if self.should_normalize else 1
+        plan = plan_filter_chain(filters, self.ddepth.value, self.padding.value, normalizer,
+                                 exact_borders=not self.should_verify_borders)
+        self.plan_label.setText(f"Plan: {plan}")
 
     @property
     def is_data_valid(self):
@@ -160,12 +188,12 @@ class TwoStageFilterForm(QDialog):
         else: ErrorBox("Invalid data")
 
     @staticmethod
-    def show_dialog(parent=None) -> tuple[np.ndarray, DesiredDepth, Padding, bool] | None:
+    def show_dialog(parent=None) -> tuple[np.ndarray, np.ndarray, DesiredDepth, Padding, bool, bool] | None:
         tsff = TwoStageFilterForm(parent)
         tsff.setModal(True)
         result = tsff.exec()
-        return (tsff.output, tsff.ddepth, tsff.padding, tsff.should_normalize) \
-            if result == QDialog.Accepted else None
+        return (tsff.filter1, tsff.filter2, tsff.ddepth, tsff.padding, tsff.should_normalize,
+                tsff.should_verify_borders) if result == QDialog.Accepted else None
 
 
 def horizontal_separator():
@@ -0,0 +1,149 @@
+from enum import Enum
+
+import cv2 as cv
+import numpy as np
+
+# 8- and 16-bit pixels give integer gradients, which float32 holds exactly as long as no sum can pass 2**24
+# (up to an aperture of 9 for 8-bit pixels, 5 for 16-bit ones); larger sums and other pixels keep float64
+GRADIENT_DEPTH = cv.CV_32F
+EXACT_GRADIENT_DTYPES = [np.dtype(np.uint8), np.dtype(np.int8), np.dtype(np.uint16), np.dtype(np.int16)]
+FLOAT32_EXACT_LIMIT = 2 ** 24
+
+# cv.Canny derives its own gradients with this aperture and replicated borders
+CANNY_KERNEL_SIZE = 3
+CANNY_BORDER = cv.BORDER_REPLICATE
+
+# Automatic Canny thresholds: the high one leaves this share of pixels below it, the low one is a fraction of it
+AUTO_NON_EDGE_FRACTION = 0.9
+AUTO_LOW_RATIO = 0.4
+
+
+def gradient_depth(dtype: np.dtype, kernel_size: int) -> int:
+    if dtype not in EXACT_GRADIENT_DTYPES:
+        return cv.CV_64F
+
+    # The largest sum either derivative can reach: every tap's weight times the largest pixel magnitude
+    derivative, smoothing = cv.getDerivKernels(1, 0, kernel_size)
+    info = np.iinfo(dtype)
+    reach = np.abs(derivative).sum() * np.abs(smoothing).sum() * max(-int(info.min), int(info.max))
+    return GRADIENT_DEPTH if reach <= FLOAT32_EXACT_LIMIT else cv.CV_64F
+
+
+class GradientNorm(Enum):
+    L1 = "L1"
+    L2 = "L2"
+
+
+class SobelOutput(Enum):
+    BLENDED = "BLENDED"
+    MAGNITUDE_L1 = "MAGNITUDE_L1"
+    MAGNITUDE_L2 = "MAGNITUDE_L2"
+    ORIENTATION = "ORIENTATION"
+
+
+class Gradients:
+    def __init__(self, img: np.ndarray, kernel_size: int, border_type: int):
+        # The pixels must not change while the gradients are in use, the image hands over a read-only buffer
+        self.img = img
+        self.kernel_size = kernel_size
+        self.border_type = border_type
+        self.depth = gradient_depth(img.dtype, kernel_size)
+
+        # Every array is computed on first use and shared by all readers, and by copies of the image
+        self._views = {}
+
+    def _sobel(self, ddepth: int, dx: int, dy: int) -> np.ndarray:
+        return cv.Sobel(self.img, ddepth, dx=dx, dy=dy, ksize=self.kernel_size, borderType=self.border_type)
+
+    @property
+    def dx(self) -> np.ndarray:
+        return self._view("dx", lambda: self._sobel(self.depth, 1, 0))
+
+    @property
+    def dy(self) -> np.ndarray:
+        return self._view("dy", lambda: self._sobel(self.depth, 0, 1))
+
+    def _view(self, name: str, compute) -> np.ndarray:
+        if name not in self._views:
+            view = compute()
+            view.flags.writeable = False
+            self._views[name] = view
+        return self._views[name]
+
+    def magnitude(self, norm: GradientNorm = GradientNorm.L2) -> np.ndarray:
+        match norm:
+            case GradientNorm.L1:
+                return self._view("magnitude_l1", lambda: cv.add(np.abs(self.dx), np.abs(self.dy)))
+            case GradientNorm.L2:
+                return self._view("magnitude_l2", lambda: cv.magnitude(self.dx, self.dy))
+
+        raise NotImplementedError(f"Unknown gradient norm: {norm}")
+
+    def magnitude_histogram(self, norm: GradientNorm = GradientNorm.L2) -> np.ndarray:
+        # Counts per whole magnitude: bin i holds the magnitudes in [i, i + 1)
+        def compute():
+            magnitude = self.magnitude(norm)
+            bins = int(np.ceil(magnitude.max(initial=0))) + 1
+            if magnitude.dtype != np.float32:
+                magnitude = magnitude.astype(np.float32)
+            return cv.calcHist([magnitude], [0], None, [bins], [0, bins]).ravel()
+
+        return self._view(f"magnitude_histogram_{norm.name}", compute)
+
+    def orientation(self) -> np.ndarray:
+        # Degrees in [0, 360), counted from the x axis towards y (down the image)
+        return self._view("orientation", lambda: cv.phase(self.dx, self.dy, angleInDegrees=True))
+
+    def blended(self, ddepth: int) -> np.ndarray:
+        # The even blend Image.sobel has always shown: both derivatives taken at ddepth first, then averaged
+        def compute():
+            dx = cv.add(self.dx, 0.0, dtype=ddepth)
+            dy = cv.add(self.dy, 0.0, dtype=ddepth)
+            return cv.addWeighted(dx, 0.5, dy, 0.5, 0)
+
+        return self._view(f"blended_{ddepth}", compute)
+
+    def int16(self) -> tuple[np.ndarray, np.ndarray]:
+        # 8-bit pixels are differentiated straight into 16 bits, as cv.Canny does for itself
+        if self.img.dtype == np.uint8 and "dx" not in self._views:
+            return (self._view("dx_int16", lambda: self._sobel(cv.CV_16S, 1, 0)),
+                    self._view("dy_int16", lambda: self._sobel(cv.CV_16S, 0, 1)))
+        return (self._view("dx_int16", lambda: cv.add(self.dx, 0.0, dtype=cv.CV_16S)),
+                self._view("dy_int16", lambda: cv.add(self.dy, 0.0, dtype=cv.CV_16S)))
+
+    def canny(self, threshold1: float, threshold2: float, l2_gradient: bool = False) -> np.ndarray:
+        dx, dy = self.int16()
+        return cv.Canny(dx, dy, threshold1, threshold2, L2gradient=l2_gradient)
+
+
+class CannySession:
+    def __init__(self, gradients: Gradients, l2_gradient: bool = False):
+        # Gradients are taken once, every threshold change only reruns non-maximum suppression and hysteresis
+        self.gradients = gradients
+        self.l2_gradient = l2_gradient
+        self._last_thresholds = None
+        self._last_edges = None
+
+    @property
+    def norm(self) -> GradientNorm:
+        return GradientNorm.L2 if self.l2_gradient else GradientNorm.L1
+
+    def edges(self, threshold1: float, threshold2: float) -> np.ndarray:
+        # The last result is kept, so a previewed setting costs nothing when it is applied
+        if self._last_thresholds != (threshold1, threshold2):
+            edges = self.gradients.canny(threshold1, threshold2, self.l2_gradient)
+            edges.flags.writeable = False
+            self._last_thresholds = (threshold1, threshold2)
+            self._last_edges = edges
+        return self._last_edges
+
+    def auto_thresholds(self,
+                        non_edge_fraction: float = AUTO_NON_EDGE_FRACTION,
+                        low_ratio: float = AUTO_LOW_RATIO) -> tuple[int, int]:
+        if not 0 < non_edge_fraction < 1 or not 0 < low_ratio <= 1:
+            raise ValueError("Invalid automatic threshold parameters!")
+
+        histogram = self.gradients.magnitude_histogram(self.norm)
+        cumulative = np.cumsum(histogram)
+        high = int(np.searchsorted(cumulative, non_edge_fraction * cumulative[-1])) + 1
+        return int(round(low_ratio * high)), high
@@ -4,13 +4,20 @@ import cv2 as cv
 import numpy as np
 import matplotlib.pyplot as plt
 import os.path
+from contextlib import contextmanager
 from enum import Enum
 import functools
 
 from cv2 import Mat
 from numpy import ndarray, dtype, generic
 
-from utils import cumsum
+from convolution import ConvolutionPlan, FilterChainPlan, convolve, composite_kernel, filter_chain
+from edge_detection import COMPASS_DIRECTIONS, compass_prewitt
+from gradients import CANNY_BORDER, CANNY_KERNEL_SIZE, CannySession, GradientNorm, Gradients, SobelOutput
+from rank_filters import median_filter, rank_filter
+from skeletonization import skeletonize, SkeletonMethod, SkeletonProgress
+from thresholding import AdaptiveThresholdSession, ThresholdStatistics
+from utils import cumsum, run_lengths, pack_bits, unpack_bits, packed_row_mask, popcount
 
 
 LMIN = 0
@@ -122,33 +129,257 @@ def binary_only(method):
     return wrapper
 
 
+# calcHist reports counts as float32, which is only exact up to 2 ** 24
+HISTOGRAM_CHUNK_PIXELS = 1 << 24
+BINARY_SCAN_CHUNK_PIXELS = 1 << 20
+
+
+def histogram_counts(arr: np.ndarray) -> np.ndarray:
+    levels = LMAX - LMIN + 1
+
+    if arr.dtype != np.uint8:
+        # Only integral values within [LMIN, LMAX] fall into a bin
+        flat = arr.ravel()
+        flat = flat[(flat >= LMIN) & (flat <= LMAX) & (flat == np.floor(flat))]
+        return np.bincount(flat.astype(np.intp) - LMIN, minlength=levels).astype(np.int64)
+
+    rows = arr.reshape(arr.shape[0], -1)
+    rows_per_chunk = max(1, HISTOGRAM_CHUNK_PIXELS // max(rows.shape[1], 1))
+    counts = np.zeros(levels, dtype=np.int64)
+
+    for start in range(0, rows.shape[0], rows_per_chunk):
+        chunk = np.ascontiguousarray(rows[start: start + rows_per_chunk])
+        counts += cv.calcHist([chunk], [0], None, [levels], [LMIN, LMAX + 1]).ravel().astype(np.int64)
+
+    return counts
+
+
+def otsu_threshold(counts: np.ndarray) -> int:
+    # Same recurrence as OpenCV's THRESH_OTSU, so both pick the same level
+    total = counts.sum()
+    if total == 0:
+        return LMIN
+
+    probabilities = counts / total
+    mu = float(np.dot(np.arange(probabilities.size), probabilities))
+    eps = float(np.finfo(np.float32).eps)
+
+    q1 = 0.0
+    mu1 = 0.0
+    max_sigma = 0.0
+    max_val = 0
+
+    for level, p_i in enumerate(probabilities.tolist()):
+        mu1 *= q1
+        q1 += p_i
+        q2 = 1.0 - q1
+
+        if min(q1, q2) < eps or max(q1, q2) > 1.0 - eps:
+            continue
+
+        mu1 = (mu1 + level * p_i) / q1
+        mu2 = (mu - q1 * mu1) / q2
+        sigma = q1 * q2 * (mu1 - mu2) * (mu1 - mu2)
+        if sigma > max_sigma:
+            max_sigma = sigma
+            max_val = level
+
+    return LMIN + max_val
+
+
+def threshold_lut(threshold: int, inv: bool = False) -> np.ndarray:
+    levels = np.arange(LMIN, LMAX + 1)
+    above = levels > threshold
+    return np.where(above != inv, LMAX, LMIN).astype(np.uint8)
+
+
 class Image:
     def __init__(self, name: str, width: int, height: int, grayscale: bool = False):
         self._name = name
         self._width = width
         self._height = height
-        self._img = np.zeros((height, width, 1 if grayscale else 3)) + LMAX  # Creates a width x height matrix of LMAX
+        self._img = None  # The LMAX canvas is only allocated if it is read before any pixels are assigned
         self._color_mode = ColorModes.GRAY if grayscale else ColorModes.RGB
 
-        if self.color_mode == ColorModes.GRAY:
-            self.create_histogram()
+        # Bumped on every pixel change; derived data is cached against it
+        self._generation = 0
+        self._histogram = None
+        self._histogram_generation = -1
+        self._histogram_computations = 0
+        self._traits = {}
+        self._traits_generation = 0
+
+        # Point operations (LUTs) waiting to be applied, see deferred_point_ops
+        self.defer_point_ops = False
+        self._pending_lut = None
+        self._base_counts = None
+
+        # Bit-packed copy of binary pixels; may be the only copy, then bytes are unpacked when first read
+        self._packed = None
 
     @grayscale_only
     def create_histogram(self):
         self._histogram = Histogram(self)
+        self._histogram_generation = self._generation
+        self._histogram_computations += 1
 
     @property
     def img(self):
-        return self._img
+        self._flush_point_ops()
+        return self._stored_pixels()
 
     @img.setter
     def img(self, value: np.ndarray):
-        self._img = value.copy()
-        if self.color_mode == ColorModes.GRAY:
-            self.create_histogram()
+        # Fresh, contiguous arrays (e.g. OpenCV results) are adopted as they are
+        self._img = self._adopt(value)
+        self._packed = None
+        self._pending_lut = None
+        self._base_counts = None
+        self._generation += 1
         self._width = self._img.shape[1]
         self._height = self._img.shape[0]
 
+    @property
+    def generation(self):
+        return self._generation
+
+    @staticmethod
+    def _adopt(value: np.ndarray) -> np.ndarray:
+        if value.flags.c_contiguous and value.flags.owndata and value.flags.writeable:
+            return value
+        return np.array(value, order="C", copy=True)
+
+    def _stored_pixels(self) -> np.ndarray:
+        if self._img is None and self._packed is not None:
+            self._img = unpack_bits(self._packed, self._width, LMAX)
+        elif self._img is None:
+            channels = 1 if self._color_mode == ColorModes.GRAY else 3
+            self._img = np.full((self._height, self._width, channels), LMAX, dtype=np.uint8)
+        return self._img
+
+    def _freeze(self) -> np.ndarray:
+        # Read-only pixels can be shared between copies until one of them writes
+        pixels = self._stored_pixels()
+        if pixels.flags.writeable:
+            pixels = pixels.view()
+            pixels.flags.writeable = False
+            self._img = pixels
+        return pixels
+
+    @property
+    def is_shared(self):
+        return not self._stored_pixels().flags.writeable
+
+    def writable_img(self) -> np.ndarray:
+        # For in-place edits: pixels shared with copies are copied first
+        pixels = self.img
+        if not pixels.flags.writeable:
+            pixels = pixels.copy()
+            self._img = pixels
+        self._packed = None
+        self._generation += 1
+        return pixels
+
+    @property
+    def is_packed(self):
+        return self._packed is not None and self._pending_lut is None
+
+    @property
+    def packed(self) -> np.ndarray:
+        # Rows of 64-bit words, one bit per pixel, set where the pixel is LMAX
+        self._flush_point_ops()
+        if self._packed is None:
+            if not self.is_binary:
+                raise NotImplementedError("Only binary images can be bit-packed!")
+            self._packed = pack_bits(self._stored_pixels())
+            self._packed.flags.writeable = False
+        return self._packed
+
+    def _set_packed(self, words: np.ndarray, width: int):
+        words.flags.writeable = False
+        self._img = None
+        self._packed = words
+        self._pending_lut = None
+        self._base_counts = None
+        self._generation += 1
+        self._width = width
+        self._height = words.shape[0]
+        self._color_mode = ColorModes.GRAY
+        self._assume_traits(is_binary=True)
+
+    @staticmethod
+    def from_packed(words: np.ndarray, width: int, name: str = None) -> "Image":
+        new_image = Image(name if name is not None else "New", width, words.shape[0], True)
+        new_image._set_packed(words, width)
+        return new_image
+
+    @property
+    def foreground_count(self) -> int:
+        if self.is_packed:
+            return popcount(self._packed)
+        return int(self._pixel_counts()[LMAX - LMIN]) if self.is_gray else cv.countNonZero(self.img)
+
+    @contextmanager
+    def deferred_point_ops(self):
+        previous = self.defer_point_ops
+        self.defer_point_ops = True
+        try:
+            yield self
+        finally:
+            self.defer_point_ops = previous
+            self._flush_point_ops()
+
+    @property
+    def has_pending_point_ops(self):
+        return self._pending_lut is not None
+
+    def _flush_point_ops(self):
+        if self._pending_lut is not None:
+            self._img = cv.LUT(self._stored_pixels(), self._pending_lut)
+            self._packed = None
+            self._pending_lut = None
+            self._base_counts = None
+
+    def _point_lut(self, lut: np.ndarray):
+        can_defer = self._stored_pixels().dtype == np.uint8 and lut.dtype == np.uint8 and lut.size == LMAX - LMIN + 1
+
+        if can_defer and (self.defer_point_ops or self._pending_lut is not None):
+            # Compose into a single table: applying lut after the pending one
+            self._pending_lut = lut if self._pending_lut is None else lut[self._pending_lut]
+            self._generation += 1
+        elif self.img.dtype == np.uint8 and lut.dtype == np.uint8 and lut.size == LMAX - LMIN + 1:
+            self.img = cv.LUT(self.img, lut)
+        else:
+            self.img = lut[self.img]
+
+    def _stored_counts(self) -> np.ndarray:
+        if self._img is not None or self._packed is None:
+            return histogram_counts(self._stored_pixels())
+
+        counts = np.zeros(LMAX - LMIN + 1, dtype=np.int64)
+        counts[LMAX - LMIN] = popcount(self._packed)
+        counts[0] = self._width * self._height - counts[LMAX - LMIN]
+        return counts
+
+    def _counts_cover_pixels(self) -> bool:
+        # Histogram counts only hold integral values in [LMIN, LMAX], which describes every pixel of 8-bit images only
+        return self.is_8bit
+
+    def _has_cheap_counts(self) -> bool:
+        if not self._counts_cover_pixels():
+            return False
+        return self._pending_lut is not None or (self._img is None and self._packed is not None)
+
+    def _pixel_counts(self) -> np.ndarray:
+        if self._pending_lut is None:
+            return self._stored_counts()
+
+        # Counts of the deferred result follow from the counts of the stored pixels
+        if self._base_counts is None:
+            self._base_counts = self._stored_counts()
+        levels = LMAX - LMIN + 1
+        return np.bincount(self._pending_lut, weights=self._base_counts, minlength=levels).astype(np.int64)
+
     @property
     def width(self):
         return self._width
@@ -167,8 +398,14 @@ class Image:
 
     @property
     def histogram(self):
+        if self._histogram is None or self._histogram_generation != self._generation:
+            self.create_histogram()
         return self._histogram
 
+    @property
+    def histogram_computations(self):
+        return self._histogram_computations
+
     @property
     def color_mode(self):
         return self._color_mode
@@ -193,14 +430,18 @@ class Image:
         return new_image
 
     @staticmethod
-    def from_numpy(arr: np.ndarray, name: str = None) -> "Image":
+    def from_numpy(arr: np.ndarray, name: str = None, copy: bool = True, color_mode: ColorModes = None) -> "Image":
         width = arr.shape[1]
         height = arr.shape[0]
         grayscale = len(arr.shape) == 2 or arr.shape[2] == 1
         name = name if name is not None else "New"
 
         new_image = Image(name, width, height, grayscale)
-        new_image.img = arr.copy()
+        if color_mode is not None and color_mode != new_image.color_mode:
+            if grayscale or color_mode == ColorModes.GRAY:
+                raise ValueError(f"A {color_mode.value} image cannot have {1 if grayscale else arr.shape[2]} channels!")
+            new_image._color_mode = color_mode
+        new_image.img = arr.copy() if copy else arr
 
         return new_image
 
@@ -210,7 +451,14 @@ class Image:
     def copy(self) -> "Image":
         new_image = Image(self._name, self.width, self.height)
         new_image._color_mode = self.color_mode
-        new_image.img = self._img.copy()
+
+        # Copy-on-write: both images read the same buffer until one of them changes it
+        if self._img is not None or self._packed is None:
+            new_image._img = self._freeze()
+        new_image._packed = self._packed
+        new_image._pending_lut = self._pending_lut
+        new_image._base_counts = self._base_counts
+        new_image._traits = dict(self._current_traits())
 
         return new_image
 
@@ -233,51 +481,152 @@ class Image:
     def is_gray(self):
         return self.color_mode == ColorModes.GRAY
 
+    @property
+    def is_8bit(self):
+        return self._img is None or self._img.dtype == np.uint8
+
+    def _current_traits(self) -> dict[str, Any]:
+        if self._traits_generation != self._generation:
+            self._traits = {}
+            self._traits_generation = self._generation
+        return self._traits
+
+    def _trait(self, name: str, compute):
+        traits = self._current_traits()
+        if name not in traits:
+            traits[name] = compute()
+        return traits[name]
+
+    def _assume_traits(self, **traits):
+        # Lets an operation record what it already knows about its own output
+        self._current_traits().update(traits)
+
+    def _cached_histogram_counts(self) -> np.ndarray | None:
+        if self.is_gray and self._histogram is not None and self._histogram_generation == self._generation \
+                and self._histogram.full_range and self._counts_cover_pixels():
+            return self._histogram.array
+        return None
+
+    def _compute_unique_values(self) -> np.ndarray:
+        counts = self._cached_histogram_counts()
+        if counts is None and self._stored_pixels().dtype == np.uint8:
+            counts = self._pixel_counts()
+        if counts is not None:
+            return np.flatnonzero(counts) + LMIN
+        return np.unique(self.img)
+
+    def _compute_min_max(self) -> tuple[Any, Any]:
+        traits = self._current_traits()
+        if "unique_values" in traits:
+            unique_values = traits["unique_values"]
+            return unique_values[0], unique_values[-1]
+
+        counts = self._cached_histogram_counts()
+        if counts is None and self._has_cheap_counts():
+            counts = self._pixel_counts()
+        if counts is not None:
+            present = np.flatnonzero(counts) + LMIN
+            return present[0], present[-1]
+
+        if self.img.ndim == 2 or self.img.shape[2] == 1:
+            min_val, max_val, *_ = cv.minMaxLoc(self.img.reshape(self.img.shape[0], -1))
+            return self.img.dtype.type(min_val), self.img.dtype.type(max_val)
+        return np.min(self.img), np.max(self.img)
+
+    def _compute_is_binary(self) -> bool:
+        if not self.is_gray:
+            return False
+
+        traits = self._current_traits()
+        if "unique_values" in traits:
+            return bool(np.isin(traits["unique_values"], [LMIN, LMAX]).all())
+
+        counts = self._cached_histogram_counts()
+        if counts is None and self._has_cheap_counts():
+            counts = self._pixel_counts()
+        if counts is not None:
+            return bool(counts[LMIN + 1: LMAX].sum() == 0)
+
+        # Scan in blocks and stop at the first block holding a value other than LMIN/LMAX
+        rows = self.img.reshape(self.img.shape[0], -1)
+        rows_per_chunk = max(1, BINARY_SCAN_CHUNK_PIXELS // max(rows.shape[1], 1))
+
+        for start in range(0, rows.shape[0], rows_per_chunk):
+            chunk = rows[start: start + rows_per_chunk]
+            if chunk.dtype == np.uint8:
+                found = cv.countNonZero(cv.inRange(chunk, LMIN + 1, LMAX - 1)) > 0
+            else:
+                found = np.any((chunk != LMIN) & (chunk != LMAX))
+            if found:
+                return False
+
+        return True
+
+    @property
+    def unique_values(self) -> np.ndarray:
+        return self._trait("unique_values", self._compute_unique_values)
+
+    @property
+    def min_value(self):
+        return self._trait("min_max", self._compute_min_max)[0]
+
+    @property
+    def max_value(self):
+        return self._trait("min_max", self._compute_min_max)[1]
+
     @property
     def is_binary(self):
-        result = self.is_gray and (np.array_equal(np.unique(self.img), np.array([LMIN, LMAX]))
-                                   or np.array_equal(np.unique(self.img), np.array([LMIN]))
-                                   or np.array_equal(np.unique(self.img), np.array([LMAX])))
-        return result
+        return self._trait("is_binary", self._compute_is_binary)
 
     @property
     def is_black(self):
-        return self.is_gray and np.array_equal(np.unique(self.img), np.array([LMIN]))
+        return self.is_gray and self.min_value == LMIN and self.max_value == LMIN
 
     def negate(self):
-        self.img = LMAX - self.img
+        if self.is_packed and not self.defer_point_ops:
+            self._set_packed(self._packed_not(), self.width)
+        elif self._stored_pixels().dtype == np.uint8:
+            self._point_lut(np.arange(LMAX, LMIN - 1, -1, dtype=np.uint8))
+        else:
+            self.img = LMAX - self.img
 
     @grayscale_only
     def stretch_histogram(self, new_min: int, new_max: int):
-        curr_min = np.min(self.img)
-        curr_max = np.max(self.img)
+        curr_min = float(self.min_value)
+        curr_max = float(self.max_value)
+        if curr_max == curr_min:
+            raise ValueError("Cannot stretch the histogram of a single-valued image!")
 
-        def f(px): return int((px - curr_min) * new_max / (curr_max - curr_min))
-        def stretch_f(px): return max(new_min, min(f(px), new_max))
+        def stretch_f(px): return np.clip(np.trunc((px - curr_min) * new_max / (curr_max - curr_min)), new_min, new_max)
 
-        self.img = np.uint8(np.vectorize(stretch_f)(self.img))
+        if self._stored_pixels().dtype == np.uint8:
+            lut = np.uint8(stretch_f(np.arange(LMIN, LMAX + 1, dtype=np.float64)))
+            self.apply_lut(lut)
+        else:
+            self.img = np.uint8(stretch_f(self.img))
 
     @grayscale_only
     def equalize_histogram(self):
         cs = cumsum(self.histogram.array)
 
-        curr_min = np.min(cs)
-        curr_max = np.max(cs)
+        curr_min = cs[0]
+        curr_max = cs[-1]
+        if curr_max == curr_min:
+            raise ValueError("Cannot equalize the histogram of a single-valued image!")
+
         new_min = 0
         new_max = 255
 
-        def f(px): return int((px - curr_min) * new_max / (curr_max - curr_min))
-        def stretch_f(px): return max(new_min, min(f(px), new_max))
-
-        cumsum_eq = np.uint8(np.vectorize(stretch_f)(cs))
-        self.img = cumsum_eq[self.img]
+        cumsum_eq = np.uint8(np.clip(np.trunc((cs - curr_min) * new_max / (curr_max - curr_min)), new_min, new_max))
+        self.apply_lut(cumsum_eq)
 
     @rgb_only
     def split_rgb(self) -> tuple["Image", "Image", "Image"]:
         channels = [
             Image.from_numpy(
-                self.img[:, :, idx].copy(),
-                f"({['R', 'G', 'B'][idx]}) {self.name}"
+                np.ascontiguousarray(self.img[:, :, idx]),
+                f"({['R', 'G', 'B'][idx]}) {self.name}",
+                copy=False
             ) for idx in range(3)
         ]
 
@@ -287,8 +636,9 @@ class Image:
     def split_lab(self) -> tuple["Image", "Image", "Image"]:
         channels = [
             Image.from_numpy(
-                self.img[:, :, idx].copy(),
-                f"({['L', 'A', 'B'][idx]}) {self.name}"
+                np.ascontiguousarray(self.img[:, :, idx]),
+                f"({['L', 'A', 'B'][idx]}) {self.name}",
+                copy=False
             ) for idx in range(3)
         ]
 
@@ -300,8 +650,9 @@ class Image:
     def split_hsv(self) -> tuple["Image", "Image", "Image"]:
         channels = [
             Image.from_numpy(
-                self.img[:, :, idx].copy(),
-                f"({['H', 'S', 'V'][idx]}) {self.name}"
+                np.ascontiguousarray(self.img[:, :, idx]),
+                f"({['H', 'S', 'V'][idx]}) {self.name}",
+                copy=False
             ) for idx in range(3)
         ]
 
@@ -335,7 +686,7 @@ class Image:
 
     @grayscale_only
     def apply_lut(self, lut: np.ndarray):
-        self.img = lut[self.img]
+        self._point_lut(lut)
 
     def blur(self, kernel_size: int):
         self.img = cv.blur(self.img, (kernel_size, kernel_size))
@@ -350,32 +701,84 @@ class Image:
         self.img = cv.Laplacian(self.img, ddepth=ddepth.value, ksize=kernel_size, borderType=padding.value)
 
     @grayscale_only
-    def sobel(self, kernel_size: int, ddepth: DesiredDepth, padding: Padding):
-        sobel_x = cv.Sobel(self.img, ddepth.value, dx=1, dy=0, ksize=kernel_size, borderType=padding.value)
-        sobel_y = cv.Sobel(self.img, ddepth.value, dx=0, dy=1, ksize=kernel_size, borderType=padding.value)
-        self.img = cv.addWeighted(sobel_x, 0.5, sobel_y, 0.5, 0)
+    def compass_prewitt(self, ddepth: DesiredDepth, padding: Padding) -> "Image":
+        response, direction = compass_prewitt(self.img, padding.value)
+        self.img = cv.add(response, 0.0, dtype=ddepth.value)
+
+        # Direction labels spread over the grey levels, N darkest, NW brightest
+        direction *= np.uint8(LMAX // (len(COMPASS_DIRECTIONS) - 1))
+        return Image.from_numpy(direction, f"COMPASS_{self.name}", copy=False)
+
+    @grayscale_only
+    def gradients(self, kernel_size: int = CANNY_KERNEL_SIZE, padding: Padding = Padding.REPLICATE) -> Gradients:
+        def compute():
+            self._flush_point_ops()
+            return Gradients(self._freeze(), kernel_size, padding.value)
+
+        return self._trait(f"gradients_{kernel_size}_{padding.name}", compute)
+
+    @grayscale_only
+    def sobel(self, kernel_size: int, ddepth: DesiredDepth, padding: Padding,
+              output: SobelOutput = SobelOutput.BLENDED):
+        gradients = self.gradients(kernel_size, padding)
+
+        match output:
+            case SobelOutput.BLENDED:
+                result = gradients.blended(ddepth.value)
+            case SobelOutput.MAGNITUDE_L1:
+                result = cv.add(gradients.magnitude(GradientNorm.L1), 0.0, dtype=ddepth.value)
+            case SobelOutput.MAGNITUDE_L2:
+                result = cv.add(gradients.magnitude(GradientNorm.L2), 0.0, dtype=ddepth.value)
+            case SobelOutput.ORIENTATION:
+                # A full turn spans the grey levels in 8 bits, degrees are kept otherwise
+                scale = LMAX / 360 if ddepth == DesiredDepth.U8 else 1
+                result = cv.multiply(gradients.orientation(), scale, dtype=ddepth.value)
+            case _:
+                raise NotImplementedError(f"Unknown Sobel output: {output}")
+
+        # Cached views are read-only, the setter copies those
+        self.img = result
+
+    def _canny_gradients(self, blur_size: int) -> Gradients:
+        if blur_size == 0:
+            return self.gradients(CANNY_KERNEL_SIZE, Padding(CANNY_BORDER))
+
+        def compute():
+            blurred = cv.GaussianBlur(self.img, (blur_size, blur_size), 0)
+            blurred.flags.writeable = False
+            return Gradients(blurred, CANNY_KERNEL_SIZE, CANNY_BORDER)
+
+        return self._trait(f"canny_gradients_{blur_size}", compute)
 
     @grayscale_only
-    def canny(self, threshold1: int, threshold2: int):
-        self.img = cv.Canny(self.img, threshold1, threshold2)
+    def canny_session(self, blur_size: int = 0, l2_gradient: bool = False) -> CannySession:
+        if blur_size < 0 or (blur_size > 0 and blur_size % 2 == 0):
+            raise ValueError("Blur size must be 0 or odd!")
+        return self._trait(f"canny_session_{blur_size}_{l2_gradient}",
+                           lambda: CannySession(self._canny_gradients(blur_size), l2_gradient))
 
     @grayscale_only
-    def convolve(self, kernel: np.ndarray, ddepth: DesiredDepth, padding: Padding, normalize: bool = True):
+    def canny(self, threshold1: int, threshold2: int, blur_size: int = 0):
+        self.img = self.canny_session(blur_size).edges(threshold1, threshold2)
+
+    @grayscale_only
+    def convolve(self, kernel: np.ndarray, ddepth: DesiredDepth, padding: Padding,
+                 normalize: bool = True) -> ConvolutionPlan:
         normalizer = max(kernel.sum(), 1) if normalize else 1
-        self.img = cv.filter2D(self.img, ddepth.value, kernel / normalizer, borderType=padding.value)
+        self.img, plan = convolve(self.img, kernel / normalizer, ddepth.value, padding.value)
+        return plan
+
+    def filter_chain(self, filters: Sequence[np.ndarray], ddepth: DesiredDepth, padding: Padding,
+                     normalize: bool = True, verify_borders: bool = False) -> FilterChainPlan:
+        normalizer = max(composite_kernel(filters).sum(), 1) if normalize else 1
+        self.img, plan = filter_chain(self.img, filters, ddepth.value, padding.value, normalizer, verify_borders)
+        return plan
 
     def median(self, size: int, padding: Padding):
-        if not (size > 1 and size % 2 == 1):
-            raise ValueError("Invalid size!")
-        padding_size = (size - 1) // 2
-        temp = cv.copyMakeBorder(self.img,
-                                 top=padding_size,
-                                 bottom=padding_size,
-                                 left=padding_size,
-                                 right=padding_size,
-                                 borderType=padding.value)
-        temp = cv.medianBlur(temp, size)
-        self.img = temp[padding_size:-padding_size, padding_size:-padding_size]
+        self.img = median_filter(self.img, size, padding.value)
+
+    def rank_filter(self, width: int, height: int, percentile: float, padding: Padding):
+        self.img = rank_filter(self.img, width, height, percentile, padding.value)
 
     def show(self):
         cv.imshow(self.name, self.img)
@@ -387,7 +790,7 @@ class Image:
         im2 = img2.img
         result = cv.add(im1, im2)
         result_name = name if name is not None else "Untitled"
-        result_image = Image.from_numpy(result, result_name)
+        result_image = Image.from_numpy(result, result_name, copy=False)
         return result_image
 
     @staticmethod
@@ -396,7 +799,7 @@ class Image:
         im2 = img2.img
         result = cv.subtract(im1, im2)
         result_name = name if name is not None else "Untitled"
-        result_image = Image.from_numpy(result, result_name)
+        result_image = Image.from_numpy(result, result_name, copy=False)
         return result_image
 
     @staticmethod
@@ -405,57 +808,82 @@ class Image:
         im2 = img2.img
         result = cv.addWeighted(im1, alpha, im2, beta, gamma)
         result_name = name if name is not None else "Untitled"
-        result_image = Image.from_numpy(result, result_name)
+        result_image = Image.from_numpy(result, result_name, copy=False)
         return result_image
 
+    @staticmethod
+    def _packable_pair(img1: "Image", img2: "Image") -> bool:
+        return img1.width == img2.width and img1.height == img2.height and img1.is_gray and img2.is_gray \
+            and img1.is_binary and img2.is_binary
+
+    def _packed_not(self) -> np.ndarray:
+        return ~self.packed & packed_row_mask(self.width)
+
     @staticmethod
     def bitwise_and_images(img1: "Image", img2: "Image", name: str | None) -> "Image":
+        result_name = name if name is not None else "Untitled"
+        if Image._packable_pair(img1, img2):
+            return Image.from_packed(img1.packed & img2.packed, img1.width, result_name)
+
         im1 = img1.img
         im2 = img2.img
         result = cv.bitwise_and(im1, im2)
-        result_name = name if name is not None else "Untitled"
-        result_image = Image.from_numpy(result, result_name)
+        result_image = Image.from_numpy(result, result_name, copy=False)
         return result_image
 
     @staticmethod
     def bitwise_or_images(img1: "Image", img2: "Image", name: str | None) -> "Image":
+        result_name = name if name is not None else "Untitled"
+        if Image._packable_pair(img1, img2):
+            return Image.from_packed(img1.packed | img2.packed, img1.width, result_name)
+
         im1 = img1.img
         im2 = img2.img
         result = cv.bitwise_or(im1, im2)
-        result_name = name if name is not None else "Untitled"
-        result_image = Image.from_numpy(result, result_name)
+        result_image = Image.from_numpy(result, result_name, copy=False)
         return result_image
 
     @staticmethod
     def bitwise_xor_images(img1: "Image", img2: "Image", name: str | None) -> "Image":
+        result_name = name if name is not None else "Untitled"
+        if Image._packable_pair(img1, img2):
+            return Image.from_packed(img1.packed ^ img2.packed, img1.width, result_name)
+
         im1 = img1.img
         im2 = img2.img
         result = cv.bitwise_xor(im1, im2)
-        result_name = name if name is not None else "Untitled"
-        result_image = Image.from_numpy(result, result_name)
+        result_image = Image.from_numpy(result, result_name, copy=False)
         return result_image
 
     @staticmethod
     def bitwise_not_image(img1: "Image", name: str | None) -> "Image":
+        result_name = name if name is not None else "Untitled"
+        if img1.is_gray and img1.is_binary:
+            return Image.from_packed(img1._packed_not(), img1.width, result_name)
+
         im1 = img1.img
         result = cv.bitwise_not(im1)
-        result_name = name if name is not None else "Untitled"
-        result_image = Image.from_numpy(result, result_name)
+        result_image = Image.from_numpy(result, result_name, copy=False)
         return result_image
 
     def bitwise_not(self):
-        result = cv.bitwise_not(self.img)
         result_name = f"not_{self.name}"
-        result_image = Image.from_numpy(result, result_name)
+        if self.is_gray and self.is_binary:
+            return Image.from_packed(self._packed_not(), self.width, result_name)
+
+        result = cv.bitwise_not(self.img)
+        result_image = Image.from_numpy(result, result_name, copy=False)
         return result_image
 
     @binary_only
     def dilate(self, kernel: np.array, padding: Padding, anchor: tuple[int, int] = (-1, -1)):
         self.img = cv.dilate(self.img, kernel, anchor=anchor, borderType=padding.value)
+        self._assume_traits(is_binary=True)
 
     @binary_only
     def erode(self, kernel: np.array, padding: Padding, anchor: tuple[int, int] = (-1, -1)):
         self.img = cv.erode(self.img, kernel, anchor=anchor, borderType=padding.value)
+        self._assume_traits(is_binary=True)
 
     @binary_only
     def morph_open(self, kernel: np.array, padding: Padding, anchor: tuple[int, int] = (-1, -1)):
@@ -468,25 +896,16 @@ class Image:
         self.erode(kernel, padding, anchor=anchor)
 
     @binary_only
-    def skeletonize(self, kernel: np.array, padding: Padding, anchor: tuple[int, int] = (-1, -1)):
-        skel = np.zeros_like(self.img)
-        img_copy = self.img.copy()
-        kernel = cv.getStructuringElement(cv.MORPH_CROSS, (3, 3))
-
-        while True:
-            img_open = cv.erode(img_copy, kernel, anchor=anchor, borderType=padding.value)
-            img_open = cv.dilate(img_open, kernel, anchor=anchor, borderType=padding.value)
-            img_subtr = cv.subtract(img_copy, img_open)
-            img_er = cv.erode(img_copy, kernel, anchor=anchor, borderType=padding.value)
-            skel = cv.bitwise_or(skel, img_subtr)
-            img_copy = img_er.copy()
-            if cv.countNonZero(img_copy) == 0:
-                self.img = skel
-                break
+    def skeletonize(self, kernel: np.array, padding: Padding, anchor: tuple[int, int] = (-1, -1),
+                    method: SkeletonMethod = SkeletonMethod.MORPHOLOGICAL, max_iterations: int | None = None,
+                    progress: SkeletonProgress | None = None):
+        pixels = self.img.reshape(self.height, self.width)
+        self.img = skeletonize(pixels, kernel, padding.value, anchor, method, max_iterations, progress)
+        self._assume_traits(is_binary=True)
 
     @grayscale_only
     def hough(self, rho, theta, threshold) -> "Image":
-        edges = cv.Canny(self.img, 50, 150)
+        edges = self.canny_session().edges(50, 150)
         lines = cv.HoughLines(edges, rho, theta, threshold)
         if lines is None:
             raise ValueError("Nothing has been detected...")
@@ -504,7 +923,7 @@ class Image:
                 pt2 = (int(x0 - length * (-b)), int(y0 - length * a))
                 cv.line(img_copy, pt1, pt2, color, thickness, cv.LINE_AA)
 
-        result = Image.from_numpy(img_copy, f"hough_{self.name}")
+        result = Image.from_numpy(img_copy, f"hough_{self.name}", copy=False)
         return result
 
     def pyramid(self, skip_quarter=False, skip_half=False, skip_double=False, skip_quadruple=False) -> list["Image"]:
@@ -512,41 +931,56 @@ class Image:
         if not skip_quarter:
             temp = cv.pyrDown(self.img)
             temp = cv.pyrDown(temp)
-            results.append(Image.from_numpy(temp, f"25%_{self.name}"))
+            results.append(Image.from_numpy(temp, f"25%_{self.name}", copy=False))
         if not skip_half:
             temp = cv.pyrDown(self.img)
-            results.append(Image.from_numpy(temp, f"50%_{self.name}"))
+            results.append(Image.from_numpy(temp, f"50%_{self.name}", copy=False))
         if not skip_double:
             temp = cv.pyrUp(self.img)
-            results.append(Image.from_numpy(temp, f"200%_{self.name}"))
+            results.append(Image.from_numpy(temp, f"200%_{self.name}", copy=False))
         if not skip_quadruple:
             temp = cv.pyrUp(self.img)
             temp = cv.pyrUp(temp)
-            results.append(Image.from_numpy(temp, f"400%_{self.name}"))
+            results.append(Image.from_numpy(temp, f"400%_{self.name}", copy=False))
 
         return results
 
     @grayscale_only
     def thresholding(self, threshold: int, inv: bool = False):
-        thresholding_mode = cv.THRESH_BINARY if not inv else cv.THRESH_BINARY_INV
-        th, result = cv.threshold(self.img, threshold, LMAX, thresholding_mode)
-        self.img = result
+        if self._stored_pixels().dtype == np.uint8:
+            self._point_lut(threshold_lut(threshold, inv))
+        else:
+            thresholding_mode = cv.THRESH_BINARY if not inv else cv.THRESH_BINARY_INV
+            th, result = cv.threshold(self.img, threshold, LMAX, thresholding_mode)
+            self.img = result
+        self._assume_traits(is_binary=True)
 
     @grayscale_only
-    def adaptive_thresholding(self, block_size: int, c: float, gaussian_mode: bool = False, inv: bool = False):
-        if block_size % 2 == 0 or block_size < 3:
-            raise ValueError("Block size must be odd and greater than 3.")
+    def adaptive_threshold_session(self) -> AdaptiveThresholdSession:
+        def compute():
+            self._flush_point_ops()
+            return AdaptiveThresholdSession(self._freeze())
 
-        method = cv.ADAPTIVE_THRESH_MEAN_C if not gaussian_mode else cv.ADAPTIVE_THRESH_GAUSSIAN_C
-        thresholding_mode = cv.THRESH_BINARY if not inv else cv.THRESH_BINARY_INV
-        result = cv.adaptiveThreshold(self.img, LMAX, method, thresholding_mode, block_size, c)
-        self.img = result
+        return self._trait("adaptive_threshold_session", compute)
+
+    @grayscale_only
+    def adaptive_thresholding(self, block_size: int, c: float, gaussian_mode: bool = False, inv: bool = False):
+        self.img = self.adaptive_threshold_session().threshold(block_size, c, gaussian_mode, inv)
+        self._assume_traits(is_binary=True)
 
     @grayscale_only
     def otsu_thresholding(self, inv: bool = False):
-        thresholding_mode = cv.THRESH_BINARY if not inv else cv.THRESH_BINARY_INV
-        th, result = cv.threshold(self.img, 0, LMAX, thresholding_mode + cv.THRESH_OTSU)
-        self.img = result
+        if self._stored_pixels().dtype == np.uint8:
+            self._point_lut(threshold_lut(otsu_threshold(self.histogram.array), inv))
+        else:
+            thresholding_mode = cv.THRESH_BINARY if not inv else cv.THRESH_BINARY_INV
+            th, result = cv.threshold(self.img, 0, LMAX, thresholding_mode + cv.THRESH_OTSU)
+            self.img = result
+        self._assume_traits(is_binary=True)
+
+    @grayscale_only
+    def threshold_statistics(self) -> ThresholdStatistics:
+        return self._trait("threshold_statistics", lambda: ThresholdStatistics(self._pixel_counts()))
 
     def grabcut_rect(self, rect: tuple[int, int, int, int], iter_count: int = 3) -> "Image":
         temp_img = self.copy()
@@ -560,11 +994,13 @@ class Image:
         out_mask = np.where((mask == 0) | (mask == 2), 0, 1)
         out_mask = np.uint8(out_mask)
 
-        temp_img.img *= out_mask[:,:,np.newaxis]
+        pixels = temp_img.writable_img()
+        pixels *= out_mask[:, :, np.newaxis]
 
-        return Image.from_numpy(temp_img.img, f"GC_{temp_img.name}")
+        return Image.from_numpy(temp_img.img, f"GC_{temp_img.name}", copy=False)
 
     def grabcut_mask(self, mask: np.ndarray, iter_count: int = 3) -> "Image":
+        mask = mask.copy()  # grabCut writes its labels into the mask
         temp_img = self.copy()
         temp_img.convert_color(ColorModes.RGB)
 
@@ -575,9 +1011,10 @@ class Image:
         out_mask = np.where((mask == 0) | (mask == 2), 0, 1)
         out_mask = np.uint8(out_mask)
 
-        temp_img.img *= out_mask[:, :, np.newaxis]
+        pixels = temp_img.writable_img()
+        pixels *= out_mask[:, :, np.newaxis]
 
-        return Image.from_numpy(temp_img.img, f"GC_{temp_img.name}")
+        return Image.from_numpy(temp_img.img, f"GC_{temp_img.name}", copy=False)
 
     def watershed(self, inv: bool = True) -> tuple["Image", "Image", "Image", int]:
         temp = self.copy()
@@ -600,7 +1037,7 @@ class Image:
         dist_trans = cv.distanceTransform(opening.img, cv.DIST_L2, 5)
         _, sure_fg = cv.threshold(dist_trans, 0.5 * dist_trans.max(), 255, 0)
         sure_fg = np.uint8(sure_fg)
-        sure_fg = Image.from_numpy(sure_fg, "sure_fg")
+        sure_fg = Image.from_numpy(sure_fg, "sure_fg", copy=False)
 
         unknown = cv.subtract(sure_bg.img, sure_fg.img)
 
@@ -610,21 +1047,23 @@ class Image:
         markers[unknown == 255] = 0
 
         markers = cv.watershed(temp.img, markers)
-        temp_gray.img[markers == -1] = 255
-        temp.img[markers == -1] = (255, 0, 0)
+        temp_gray.writable_img()[markers == -1] = 255
+        temp.writable_img()[markers == -1] = (255, 0, 0)
 
         binary_mask = np.zeros_like(temp_gray.img)
         binary_mask[markers > 1] = LMAX
 
-        result = Image.from_numpy(temp.img, f"WS_{self.name}")
+        result = Image.from_numpy(temp.img, f"WS_{self.name}", copy=False)
 
         colors = Image.from_numpy(
             cv.cvtColor(cv.applyColorMap(np.uint8(markers * 10), cv.COLORMAP_PARULA), cv.COLOR_BGR2RGB),
-            f"WS_COLORMAP_{self.name}")
+            f"WS_COLORMAP_{self.name}",
+            copy=False)
 
         bin_mask = Image.from_numpy(
             binary_mask,
-            f"WS_BINARY_{self.name}")
+            f"WS_BINARY_{self.name}",
+            copy=False)
 
         found = np.max(markers) - 1
 
@@ -637,7 +1076,7 @@ class Image:
             raise ValueError("Invalid mask!")
 
         result = cv.inpaint(self.img, mask, iter_count, cv.INPAINT_TELEA)
-        result_img = Image.from_numpy(result, f"INPAINT_{self.name}")
+        result_img = Image.from_numpy(result, f"INPAINT_{self.name}", copy=False)
 
         return result_img
 
@@ -648,7 +1087,7 @@ class Image:
             raise ValueError("Invalid mask!")
 
         result = cv.inpaint(self.img, mask, iter_count, cv.INPAINT_NS)
-        result_img = Image.from_numpy(result, f"INPAINT_{self.name}")
+        result_img = Image.from_numpy(result, f"INPAINT_{self.name}", copy=False)
 
         return result_img
 
@@ -682,32 +1121,18 @@ class Image:
             else:
                 c = color
             clr = np.array(c, dtype=np.float64)
-            result.img = cv.drawContours(result.img, [cnt], 0, clr, 3 if not filled else cv.FILLED)
+            cv.drawContours(result.writable_img(), [cnt], 0, clr, 3 if not filled else cv.FILLED)
 
         return result
 
     @grayscale_only
-    def rle_encode_img(self) -> list[tuple[int, int]]:
-        result = []
-        flat_img = list(self.img.flat)
+    def rle_encode_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        return run_lengths(self.img)
 
-        curr_pix = flat_img[0]
-        curr_count = 0
-
-        for pixel in flat_img:
-            if pixel == curr_pix:
-                curr_count += 1
-            else:
-                t = (curr_pix, curr_count)
-                result.append(t)
-                curr_pix = pixel
-                curr_count = 1
-
-        # Add the final finding
-        t = (curr_pix, curr_count)
-        result.append(t)
-
-        return result
+    @grayscale_only
+    def rle_encode_img(self) -> list[tuple[int, int]]:
+        values, counts = self.rle_encode_arrays()
+        return list(zip(values.tolist(), counts.tolist()))
 
 
 class Histogram:
@@ -719,17 +1144,16 @@ class Histogram:
 
     def histogramize(self, full_range: bool = True) -> None:
         self.full_range = full_range
-        img_array = self.parent.img.flatten()
+        counts = self.parent._pixel_counts()
         if self.full_range:
             self.min = LMIN
             self.max = LMAX
-            self.hist_array = np.arange(LMAX - LMIN + 1)
-            self.hist_array = np.vectorize(lambda px: np.count_nonzero(img_array == px))(self.hist_array)
+            self.hist_array = counts
         else:
-            self.min = np.min(img_array)
-            self.max = np.max(img_array)
-            self.hist_array = np.arange(self.min, self.max + 1)
-            self.hist_array = np.vectorize(lambda px: np.count_nonzero(img_array == px))(self.hist_array)
+            present = np.flatnonzero(counts)
+            self.min = present[0] if present.size > 0 else LMIN
+            self.max = present[-1] if present.size > 0 else LMIN
+            self.hist_array = counts[self.min: self.max + 1]
 
     @property
     def array(self):
@@ -1,7 +1,16 @@
+import io
+import lzma
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Callable
+
 import numpy as np
 import cv2 as cv
-from image import StructuringElementShape
-from utils import rhombus_ones
+from image import StructuringElementShape, ColorModes, LMIN, LMAX
+from utils import rhombus_ones, run_lengths
 
 
 def structuring_element(shape: StructuringElementShape, n: int):
@@ -23,57 +32,674 @@ def structuring_element(shape: StructuringElementShape, n: int):
     return result
 
 
-def make_binary_rle(rle: list[tuple[int, int]], height: int, width: int) -> bytearray:
-    header_structure = (4, 4)
-    entry_structure = (2, 4)
+RLE_HEADER_DTYPE = np.dtype([("height", ">u4"), ("width", ">u4")])
+RLE_ENTRY_DTYPE = np.dtype([("value", ">u2"), ("count", ">u4")])
+
+# Version 2: header, strip index, then each strip's runs encoded independently.
+# A strip holds one run plane per channel, preceded by the planes' byte lengths, optionally compressed as a whole.
+RLE_V2_MAGIC = b"PRLE"
+RLE_V2_HEADER_DTYPE = np.dtype([
+    ("magic", "S4"), ("version", "u1"), ("encoding", "u1"), ("compression", "u1"), ("channels", "u1"),
+    ("dtype", "S4"), ("color_mode", "S4"),
+    ("height", ">u4"), ("width", ">u4"), ("strip_rows", ">u4"), ("strip_count", ">u4")
+])
+RLE_V2_INDEX_DTYPE = np.dtype(">u8")
+RLE_V2_PLANE_SIZE_DTYPE = np.dtype(">u4")
+RLE_V2_STRIP_ROWS = 16
+RLE_V2_DTYPES = [np.dtype(np.uint8), np.dtype(np.uint16)]
+RLE_LZMA_DICT_SIZE = 1 << 20
+
+
+class RLEFormat(Enum):
+    V1 = 1
+    V2 = 2
+
+
+class RLEEncoding(Enum):
+    RUNS = 0
+    BINARY = 1  # Alternating LMIN/LMAX run lengths, starting with LMIN, as varints
+
+
+class RLECompression(Enum):
+    NONE = 0
+    ZLIB = 1
+    LZMA = 2
+
+PNG_BENCHMARK_LEVELS = [1, 3, 6, 9]
+
+# Streaming decode works through this many runs / expands at most this many pixels at once
+RLE_STREAM_CHUNK_RUNS = 1 << 16
+RLE_STREAM_CHUNK_PIXELS = 1 << 24
 
-    rle_bytes = bytearray()
 
-    header_vals = (height, width)
-    for idx, val in enumerate(header_vals):
-        v = int(val)
-        b = v.to_bytes(header_structure[idx], "big")
-        rle_bytes.extend(b)
+def make_binary_rle_arrays(values: np.ndarray, counts: np.ndarray, height: int, width: int) -> bytearray:
+    header = np.zeros(1, dtype=RLE_HEADER_DTYPE)
+    header["height"] = height
+    header["width"] = width
 
-    for pair in rle:
-        for idx, val in enumerate(pair):
-            v = int(val)
-            b = v.to_bytes(entry_structure[idx], "big")
-            rle_bytes.extend(b)
+    entries = np.empty(len(values), dtype=RLE_ENTRY_DTYPE)
+    entries["value"] = values
+    entries["count"] = counts
+
+    rle_bytes = bytearray(header.nbytes + entries.nbytes)
+    rle_bytes[:header.nbytes] = header.tobytes()
+    rle_bytes[header.nbytes:] = entries.tobytes()
 
     return rle_bytes
 
 
+def make_binary_rle(rle: list[tuple[int, int]], height: int, width: int) -> bytearray:
+    pairs = np.array(rle, dtype=np.int64).reshape(-1, 2)
+    return make_binary_rle_arrays(pairs[:, 0], pairs[:, 1], height, width)
+
+
+def parse_binary_rle_runs(input_bytes: bytes | bytearray | memoryview) -> tuple[int, int, np.ndarray, np.ndarray]:
+    header = np.frombuffer(input_bytes, dtype=RLE_HEADER_DTYPE, count=1)[0]
+    height = int(header["height"])
+    width = int(header["width"])
+
+    entry_count = (len(input_bytes) - RLE_HEADER_DTYPE.itemsize) // RLE_ENTRY_DTYPE.itemsize
+    entries = np.frombuffer(input_bytes, dtype=RLE_ENTRY_DTYPE, count=entry_count, offset=RLE_HEADER_DTYPE.itemsize)
+
+    return height, width, entries["value"], entries["count"]
+
+
+def clip_runs(values: np.ndarray, counts: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    counts = counts.astype(np.int64)
+    total = int(counts.sum())
+
+    if total == size:
+        return values, counts
+
+    # Runs that overflow the image are cut off, missing pixels become a run of 0
+    ends = np.minimum(np.cumsum(counts), size)
+    kept = np.searchsorted(ends, size, side="left") + 1
+    values = values[:kept]
+    counts = np.diff(np.concatenate(([0], ends[:kept])))
+    if total < size:
+        values = np.append(values, 0).astype(values.dtype)
+        counts = np.append(counts, size - total)
+
+    return values, counts
+
+
+def expand_runs(values: np.ndarray, counts: np.ndarray, size: int, dtype=np.uint8) -> np.ndarray:
+    values, counts = clip_runs(values, counts, size)
+    return np.repeat(values.astype(dtype), counts)
+
+
 def parse_binary_rle(input_bytes: bytearray) -> np.ndarray:
-    header_structure = (4, 4)
-    entry_structure = (2, 4)
+    if is_rle_v2(input_bytes):
+        return parse_rle_v2(input_bytes)
+
+    height, width, values, counts = parse_binary_rle_runs(input_bytes)
+    result = expand_runs(values, counts, height * width)
+
+    result = result.reshape((height, width))
+    return result
+
 
-    temp_bytes = input_bytes.copy()
+def read_binary_rle_header(path: str) -> tuple[int, int]:
+    with open(path, "rb") as f:
+        header_bytes = f.read(RLE_HEADER_DTYPE.itemsize)
+    if len(header_bytes) < RLE_HEADER_DTYPE.itemsize:
+        raise ValueError("File is too short to be an RLE file!")
 
-    height = int.from_bytes(temp_bytes[:header_structure[0]], byteorder="big")
-    del temp_bytes[:header_structure[0]]
+    header = np.frombuffer(header_bytes, dtype=RLE_HEADER_DTYPE, count=1)[0]
+    return int(header["height"]), int(header["width"])
 
-    width = int.from_bytes(temp_bytes[:entry_structure[1]], byteorder="big")
-    del temp_bytes[:entry_structure[1]]
 
-    result = np.zeros(height * width, dtype=np.uint8)
+def _write_runs(target: np.ndarray, values: np.ndarray, counts: np.ndarray, max_pixels: int) -> None:
+    total = int(counts.sum())
+
+    if len(values) == 1:
+        target[:total] = values[0]
+    elif total <= max_pixels:
+        target[:total] = np.repeat(values, counts)
+    else:
+        # Split until the expanded pieces fit the budget; single huge runs become plain fills
+        half = len(values) // 2
+        split = int(counts[:half].sum())
+        _write_runs(target[:split], values[:half], counts[:half], max_pixels)
+        _write_runs(target[split:total], values[half:], counts[half:], max_pixels)
+
+
+def stream_binary_rle(path: str,
+                      row_start: int = 0,
+                      row_stop: int | None = None,
+                      out: np.ndarray | str | None = None,
+                      chunk_runs: int = RLE_STREAM_CHUNK_RUNS,
+                      chunk_pixels: int = RLE_STREAM_CHUNK_PIXELS) -> np.ndarray:
+    height, width = read_binary_rle_header(path)
+    row_stop = height if row_stop is None else min(row_stop, height)
+    if not 0 <= row_start <= row_stop:
+        raise ValueError("Invalid row range!")
+
+    rows = row_stop - row_start
+    if out is None:
+        out = np.zeros((rows, width), dtype=np.uint8)
+    elif isinstance(out, str):
+        out = np.memmap(out, dtype=np.uint8, mode="w+", shape=(rows, width))
+    elif out.shape != (rows, width) or out.dtype != np.uint8 or not out.flags.c_contiguous:
+        raise ValueError("Output array does not match the requested rows!")
+
+    out_flat = out.reshape(-1)
+    first_pixel = row_start * width
+    last_pixel = row_stop * width
     filled = 0
 
-    while temp_bytes:
-        entry_bytes = []
-        for length in entry_structure:
-            b = temp_bytes[:length]
-            entry_bytes.append(b)
-            del temp_bytes[:length]
+    source = np.memmap(path, dtype=np.uint8, mode="r")
+    entry_count = (source.size - RLE_HEADER_DTYPE.itemsize) // RLE_ENTRY_DTYPE.itemsize
+    entries_end = RLE_HEADER_DTYPE.itemsize + entry_count * RLE_ENTRY_DTYPE.itemsize
+    entries = source[RLE_HEADER_DTYPE.itemsize: entries_end].view(RLE_ENTRY_DTYPE)
 
-        # There are two items in that list
+    position = 0
+    for chunk_start in range(0, entry_count, chunk_runs):
+        if position >= last_pixel:
+            break
 
-        pixel_value_b, pixel_count_b = entry_bytes
-        pixel_value = int.from_bytes(pixel_value_b, byteorder="big")
-        pixel_count = int.from_bytes(pixel_count_b, byteorder="big")
+        chunk = entries[chunk_start: chunk_start + chunk_runs]
+        counts = chunk["count"].astype(np.int64)
+        ends = position + np.cumsum(counts)
+        position = int(ends[-1])
+        if position <= first_pixel:
+            continue
 
-        result[filled: filled + pixel_count] = pixel_value
-        filled += pixel_count
+        # Clip the chunk's runs to the requested pixel range
+        starts = np.maximum(ends - counts, first_pixel)
+        ends = np.minimum(ends, last_pixel)
+        keep = ends > starts
+        if not keep.any():
+            continue
 
-    result = result.reshape((height, width))
-    return result
\ No newline at end of file
+        values = chunk["value"][keep].astype(np.uint8)
+        counts = ends[keep] - starts[keep]
+        offset = int(starts[keep][0]) - first_pixel
+        _write_runs(out_flat[offset:], values, counts, chunk_pixels)
+        filled = offset + int(counts.sum())
+
+    # Missing pixels of a truncated file stay 0, as in parse_binary_rle
+    out_flat[filled:] = 0
+
+    return out
+
+
+def is_rle_v2(input_bytes: bytes | bytearray | memoryview | np.ndarray) -> bool:
+    return bytes(input_bytes[:len(RLE_V2_MAGIC)]) == RLE_V2_MAGIC
+
+
+def encode_varints(numbers: np.ndarray) -> np.ndarray:
+    numbers = np.asarray(numbers, dtype=np.uint64)
+    if numbers.size == 0:
+        return np.zeros(0, dtype=np.uint8)
+
+    # LEB128: 7 bits per byte, least significant group first, high bit set on all but the last byte
+    lengths = np.ones(numbers.size, dtype=np.int64)
+    rest = numbers >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+
+    group_positions = np.arange(lengths.max())
+    shifts = (7 * group_positions).astype(np.uint64)
+    groups = ((numbers[:, np.newaxis] >> shifts) & np.uint64(0x7F)).astype(np.uint8)
+    groups[group_positions < lengths[:, np.newaxis] - 1] |= 0x80
+
+    return groups[group_positions < lengths[:, np.newaxis]]
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    data = np.asarray(data, dtype=np.uint8)
+    ends = np.flatnonzero(data < 0x80)
+    if ends.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    data = data[:ends[-1] + 1]
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    number_idx = np.repeat(np.arange(ends.size), ends - starts + 1)
+    shifts = (7 * (np.arange(data.size) - starts[number_idx])).astype(np.uint64)
+    parts = (data & 0x7F).astype(np.uint64) << shifts
+
+    return np.add.reduceat(parts, starts)
+
+
+def is_binary_array(img: np.ndarray) -> bool:
+    if img.dtype == np.uint8:
+        return cv.countNonZero(cv.inRange(img.reshape(img.shape[0], -1), LMIN + 1, LMAX - 1)) == 0
+    return bool(np.all((img == LMIN) | (img == LMAX)))
+
+
+def compress_bytes(data: bytes, compression: RLECompression, level: int) -> bytes:
+    match compression:
+        case RLECompression.ZLIB:
+            return zlib.compress(data, level)
+        case RLECompression.LZMA:
+            filters = [{"id": lzma.FILTER_LZMA2, "preset": level, "dict_size": RLE_LZMA_DICT_SIZE}]
+            return lzma.compress(data, format=lzma.FORMAT_RAW, filters=filters)
+    return data
+
+
+def decompress_bytes(data: bytes, compression: RLECompression) -> bytes:
+    match compression:
+        case RLECompression.ZLIB:
+            return zlib.decompress(data)
+        case RLECompression.LZMA:
+            filters = [{"id": lzma.FILTER_LZMA2, "dict_size": RLE_LZMA_DICT_SIZE}]
+            return lzma.decompress(data, format=lzma.FORMAT_RAW, filters=filters)
+    return data
+
+
+def _encode_rle_v2_plane(plane: np.ndarray, encoding: RLEEncoding) -> bytes:
+    values, counts = run_lengths(plane)
+
+    if encoding == RLEEncoding.BINARY:
+        if values.size > 0 and values[0] != LMIN:
+            counts = np.concatenate(([0], counts))
+        return encode_varints(counts).tobytes()
+
+    # Column-wise (all values, then all counts) rather than interleaved entries, which compresses better
+    value_dtype, count_dtype = RLE_ENTRY_DTYPE["value"], RLE_ENTRY_DTYPE["count"]
+    return values.astype(value_dtype).tobytes() + counts.astype(count_dtype).tobytes()
+
+
+def _rle_v2_plane_runs(payload: np.ndarray, encoding: RLEEncoding) -> tuple[np.ndarray, np.ndarray]:
+    if encoding == RLEEncoding.BINARY:
+        counts = decode_varints(payload)
+        values = np.where(np.arange(counts.size) % 2 == 0, LMIN, LMAX).astype(np.uint8)
+        return values, counts
+
+    value_dtype, count_dtype = RLE_ENTRY_DTYPE["value"], RLE_ENTRY_DTYPE["count"]
+    run_count = payload.size // RLE_ENTRY_DTYPE.itemsize
+    values_end = run_count * value_dtype.itemsize
+    values = payload[:values_end].view(value_dtype)
+    counts = payload[values_end: values_end + run_count * count_dtype.itemsize].view(count_dtype)
+    return values, counts
+
+
+def _decode_rle_v2_plane(payload: np.ndarray, encoding: RLEEncoding, size: int, dtype=np.uint8) -> np.ndarray:
+    values, counts = _rle_v2_plane_runs(payload, encoding)
+    return expand_runs(values, counts, size, dtype)
+
+
+def _encode_rle_v2_strip(strip: np.ndarray,
+                         encoding: RLEEncoding,
+                         compression: RLECompression,
+                         level: int) -> bytes:
+    planes = [_encode_rle_v2_plane(np.ascontiguousarray(strip[..., channel]), encoding)
+              for channel in range(strip.shape[2])]
+    plane_sizes = np.array([len(plane) for plane in planes], dtype=RLE_V2_PLANE_SIZE_DTYPE)
+
+    return compress_bytes(plane_sizes.tobytes() + b"".join(planes), compression, level)
+
+
+def _rle_v2_strip_planes(payload: np.ndarray, compression: RLECompression, channels: int) -> list[np.ndarray]:
+    if compression != RLECompression.NONE:
+        payload = np.frombuffer(decompress_bytes(payload.tobytes(), compression), dtype=np.uint8)
+
+    plane_sizes = payload[:channels * RLE_V2_PLANE_SIZE_DTYPE.itemsize].view(RLE_V2_PLANE_SIZE_DTYPE)
+    plane_ends = plane_sizes.nbytes + np.cumsum(plane_sizes, dtype=np.int64)
+
+    return [payload[plane_ends[channel] - plane_sizes[channel]: plane_ends[channel]] for channel in range(channels)]
+
+
+def _decode_rle_v2_strip(payload: np.ndarray,
+                         encoding: RLEEncoding,
+                         compression: RLECompression,
+                         channels: int,
+                         dtype: np.dtype,
+                         rows: int,
+                         width: int) -> np.ndarray:
+    strip = np.empty((rows, width, channels), dtype=dtype)
+    for channel, plane in enumerate(_rle_v2_strip_planes(payload, compression, channels)):
+        strip[..., channel] = _decode_rle_v2_plane(plane, encoding, rows * width, dtype).reshape(rows, width)
+
+    return strip
+
+
+def make_rle_v2(img: np.ndarray,
+                strip_rows: int = RLE_V2_STRIP_ROWS,
+                workers: int | None = None,
+                encoding: RLEEncoding | None = None,
+                compression: RLECompression = RLECompression.NONE,
+                level: int = 6,
+                color_mode: ColorModes | None = None) -> bytearray:
+    if img.ndim == 2:
+        img = img[..., np.newaxis]
+    if img.ndim != 3 or not 1 <= img.shape[2] <= 255:
+        raise ValueError("Only 2D images with up to 255 channels are supported!")
+    if img.dtype not in RLE_V2_DTYPES:
+        raise ValueError(f"Unsupported pixel type: {img.dtype}")
+    if strip_rows < 1:
+        raise ValueError("Strips must be at least one row high!")
+    if not 0 <= level <= 9:
+        raise ValueError("Compression level must be between 0 and 9!")
+
+    if color_mode is None:
+        color_mode = ColorModes.GRAY if img.shape[2] == 1 else ColorModes.RGB
+
+    binary = is_binary_array(img)
+    if encoding is None:
+        encoding = RLEEncoding.BINARY if binary else RLEEncoding.RUNS
+    elif encoding == RLEEncoding.BINARY and not binary:
+        raise ValueError("Binary RLE can only store binary images!")
+
+    height, width, channels = img.shape
+    strips = [img[top: top + strip_rows] for top in range(0, height, strip_rows)]
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        payloads = list(executor.map(lambda strip: _encode_rle_v2_strip(strip, encoding, compression, level), strips))
+
+    header = np.zeros(1, dtype=RLE_V2_HEADER_DTYPE)
+    header["magic"] = RLE_V2_MAGIC
+    header["version"] = RLEFormat.V2.value
+    header["encoding"] = encoding.value
+    header["compression"] = compression.value
+    header["channels"] = channels
+    header["dtype"] = img.dtype.str.encode()
+    header["color_mode"] = color_mode.value.encode()
+    header["height"] = height
+    header["width"] = width
+    header["strip_rows"] = strip_rows
+    header["strip_count"] = len(strips)
+
+    index = np.zeros(len(strips) + 1, dtype=RLE_V2_INDEX_DTYPE)
+    index[1:] = np.cumsum([len(payload) for payload in payloads])
+
+    rle_bytes = bytearray(header.tobytes())
+    rle_bytes.extend(index.tobytes())
+    for payload in payloads:
+        rle_bytes.extend(payload)
+
+    return rle_bytes
+
+
+def read_rle_v2_header(input_bytes: bytes | bytearray | memoryview | np.ndarray) -> dict:
+    if not is_rle_v2(input_bytes):
+        raise ValueError("Not a version 2 RLE file!")
+
+    header = np.frombuffer(input_bytes, dtype=RLE_V2_HEADER_DTYPE, count=1)[0]
+    if header["version"] != RLEFormat.V2.value:
+        raise ValueError(f"Unsupported RLE version: {header['version']}")
+
+    result = {name: int(header[name]) for name in ["height", "width", "strip_rows", "strip_count", "channels"]}
+    result["encoding"] = RLEEncoding(int(header["encoding"]))
+    result["compression"] = RLECompression(int(header["compression"]))
+    result["dtype"] = np.dtype(header["dtype"].decode())
+    result["color_mode"] = ColorModes(header["color_mode"].decode())
+
+    if result["dtype"] not in RLE_V2_DTYPES:
+        raise ValueError(f"Unsupported pixel type: {result['dtype']}")
+
+    return result
+
+
+def parse_rle_v2(input_bytes: bytes | bytearray | memoryview | np.ndarray,
+                 row_start: int = 0,
+                 row_stop: int | None = None,
+                 workers: int | None = None) -> np.ndarray:
+    header = read_rle_v2_header(input_bytes)
+    height, width, strip_rows = header["height"], header["width"], header["strip_rows"]
+    strip_count, channels, dtype = header["strip_count"], header["channels"], header["dtype"]
+    encoding, compression = header["encoding"], header["compression"]
+
+    row_stop = height if row_stop is None else min(row_stop, height)
+    if not 0 <= row_start <= row_stop:
+        raise ValueError("Invalid row range!")
+
+    index_offset = RLE_V2_HEADER_DTYPE.itemsize
+    index = np.frombuffer(input_bytes, dtype=RLE_V2_INDEX_DTYPE, count=strip_count + 1, offset=index_offset)
+    payload_offset = index_offset + index.nbytes
+
+    result = np.zeros((row_stop - row_start, width, channels), dtype=dtype)
+    first_strip = row_start // strip_rows
+    last_strip = (row_stop + strip_rows - 1) // strip_rows
+
+    def decode_strip(strip_idx: int):
+        top = strip_idx * strip_rows
+        bottom = min(top + strip_rows, height)
+        start = payload_offset + int(index[strip_idx])
+        length = int(index[strip_idx + 1]) - int(index[strip_idx])
+        payload = np.frombuffer(input_bytes, dtype=np.uint8, count=length, offset=start)
+
+        strip = _decode_rle_v2_strip(payload, encoding, compression, channels, dtype, bottom - top, width)
+
+        # Only the requested rows of the strip are copied out
+        keep_top = max(top, row_start)
+        keep_bottom = min(bottom, row_stop)
+        result[keep_top - row_start: keep_bottom - row_start] = strip[keep_top - top: keep_bottom - top]
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        list(executor.map(decode_strip, range(first_strip, last_strip)))
+
+    return result[..., 0] if channels == 1 else result
+
+
+def read_rle_header(path: str) -> tuple[int, int, ColorModes]:
+    with open(path, "rb") as f:
+        head = f.read(RLE_V2_HEADER_DTYPE.itemsize)
+
+    if is_rle_v2(head):
+        header = read_rle_v2_header(head)
+        return header["height"], header["width"], header["color_mode"]
+
+    return *read_binary_rle_header(path), ColorModes.GRAY
+
+
+def load_rle(path: str, row_start: int = 0, row_stop: int | None = None) -> np.ndarray:
+    with open(path, "rb") as f:
+        head = f.read(len(RLE_V2_MAGIC))
+
+    if is_rle_v2(head):
+        return parse_rle_v2(np.memmap(path, dtype=np.uint8, mode="r"), row_start, row_stop)
+
+    return stream_binary_rle(path, row_start, row_stop)
+
+
+def read_rle_runs(input_bytes: bytes | bytearray | memoryview | np.ndarray) -> tuple[int, int, np.ndarray, np.ndarray]:
+    if not is_rle_v2(input_bytes):
+        height, width, values, counts = parse_binary_rle_runs(input_bytes)
+        values, counts = clip_runs(values, counts, height * width)
+        return height, width, values.astype(np.uint8), counts
+
+    header = read_rle_v2_header(input_bytes)
+    height, width, strip_rows = header["height"], header["width"], header["strip_rows"]
+    strip_count = header["strip_count"]
+    if header["channels"] != 1 or header["dtype"] != np.uint8:
+        raise ValueError("Only single-channel 8-bit images can be read as runs!")
+
+    index_offset = RLE_V2_HEADER_DTYPE.itemsize
+    index = np.frombuffer(input_bytes, dtype=RLE_V2_INDEX_DTYPE, count=strip_count + 1, offset=index_offset)
+    payload_offset = index_offset + index.nbytes
+
+    strip_values, strip_counts = [], []
+    for strip_idx in range(strip_count):
+        rows = min(strip_rows, height - strip_idx * strip_rows)
+        start = payload_offset + int(index[strip_idx])
+        length = int(index[strip_idx + 1]) - int(index[strip_idx])
+        payload = np.frombuffer(input_bytes, dtype=np.uint8, count=length, offset=start)
+
+        plane = _rle_v2_strip_planes(payload, header["compression"], 1)[0]
+        values, counts = clip_runs(*_rle_v2_plane_runs(plane, header["encoding"]), rows * width)
+        strip_values.append(values.astype(np.uint8))
+        strip_counts.append(counts)
+
+    # Runs continuing across strip borders are joined again
+    values, counts = merge_runs(np.concatenate(strip_values), np.concatenate(strip_counts))
+    return height, width, values, counts
+
+
+# Run-domain operations: masks stay as (values, counts) in row-major order, work is proportional to the run count
+
+def merge_runs(values: np.ndarray, counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    counts = counts.astype(np.int64)
+    non_empty = counts > 0
+    values, counts = values[non_empty], counts[non_empty]
+    if values.size == 0:
+        return values, counts
+
+    starts = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+    return values[starts], np.add.reduceat(counts, starts)
+
+
+def combine_runs(values_a: np.ndarray, counts_a: np.ndarray,
+                 values_b: np.ndarray, counts_b: np.ndarray,
+                 op: np.ufunc = np.bitwise_and) -> tuple[np.ndarray, np.ndarray]:
+    ends_a = np.cumsum(counts_a, dtype=np.int64)
+    ends_b = np.cumsum(counts_b, dtype=np.int64)
+    size_a = int(ends_a[-1]) if ends_a.size > 0 else 0
+    size_b = int(ends_b[-1]) if ends_b.size > 0 else 0
+    if size_a != size_b:
+        raise ValueError("Both masks must have the same number of pixels!")
+    if size_a == 0:
+        return values_a[:0], counts_a[:0].astype(np.int64)
+
+    # Every run boundary of either mask closes a segment with a constant value in both. A stable sort merges the
+    # two sorted boundary lists in linear time, the number of boundaries of A before a segment's end is its run in A
+    boundaries = np.concatenate((ends_a, ends_b))
+    order = np.argsort(boundaries, kind="stable")
+    boundaries = boundaries[order]
+    from_a = order < ends_a.size
+    a_before = np.cumsum(from_a) - from_a
+    b_before = np.arange(boundaries.size) - a_before
+
+    first = np.empty(boundaries.size, dtype=bool)
+    first[0] = True
+    np.not_equal(boundaries[1:], boundaries[:-1], out=first[1:])
+    ends = boundaries[first]
+    values = op(values_a[a_before[first]], values_b[b_before[first]])
+
+    return merge_runs(values, np.diff(ends, prepend=0))
+
+
+def and_runs(values_a, counts_a, values_b, counts_b) -> tuple[np.ndarray, np.ndarray]:
+    return combine_runs(values_a, counts_a, values_b, counts_b, np.bitwise_and)
+
+
+def or_runs(values_a, counts_a, values_b, counts_b) -> tuple[np.ndarray, np.ndarray]:
+    return combine_runs(values_a, counts_a, values_b, counts_b, np.bitwise_or)
+
+
+def xor_runs(values_a, counts_a, values_b, counts_b) -> tuple[np.ndarray, np.ndarray]:
+    return combine_runs(values_a, counts_a, values_b, counts_b, np.bitwise_xor)
+
+
+def not_runs(values: np.ndarray, counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return np.bitwise_not(values.astype(np.uint8)), counts
+
+
+def runs_pixel_count(values: np.ndarray, counts: np.ndarray, value: int | None = None) -> int:
+    selected = values != LMIN if value is None else values == value
+    return int(counts[selected].sum())
+
+
+def runs_histogram(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    return np.bincount(values.astype(np.intp), weights=counts, minlength=LMAX + 1).astype(np.int64)
+
+
+def runs_row_bounds(values: np.ndarray, counts: np.ndarray, width: int) -> np.ndarray:
+    ends = np.cumsum(counts, dtype=np.int64)
+    height = int(ends[-1]) // width if ends.size > 0 else 0
+    foreground = (values != LMIN) & (counts > 0)
+
+    first_pixels = (ends - counts)[foreground]
+    last_pixels = ends[foreground] - 1
+    first_rows, first_cols = np.divmod(first_pixels, width)
+    last_rows, last_cols = np.divmod(last_pixels, width)
+
+    # (first column, last column) per row, -1 where the row has no foreground
+    bounds = np.full((height, 2), -1, dtype=np.int64)
+
+    # Runs are sorted, so the first run starting in a row gives its leftmost column, the last one ending its rightmost
+    rows, idx = np.unique(first_rows, return_index=True)
+    bounds[rows, 0] = first_cols[idx]
+    rows, idx = np.unique(last_rows[::-1], return_index=True)
+    bounds[rows, 1] = last_cols[::-1][idx]
+
+    # Runs wrapping to later rows reach the right edge of their first row and the left edge of their last one,
+    # rows in between are covered completely
+    wrapping = last_rows > first_rows
+    bounds[first_rows[wrapping], 1] = width - 1
+    bounds[last_rows[wrapping], 0] = 0
+
+    covered = np.zeros(height + 1, dtype=np.int64)
+    np.add.at(covered, first_rows[wrapping] + 1, 1)
+    np.add.at(covered, last_rows[wrapping], -1)
+    bounds[np.cumsum(covered[:-1]) > 0] = (0, width - 1)
+
+    return bounds
+
+
+def runs_bounding_box(values: np.ndarray, counts: np.ndarray, width: int) -> tuple[int, int, int, int]:
+    bounds = runs_row_bounds(values, counts, width)
+    rows = np.flatnonzero(bounds[:, 1] >= 0)
+    if rows.size == 0:
+        return 0, 0, 0, 0
+
+    left = int(bounds[rows, 0].min())
+    right = int(bounds[rows, 1].max())
+    return left, int(rows[0]), right - left + 1, int(rows[-1] - rows[0] + 1)
+
+
+def _timed(f, repeats: int, should_stop: Callable[[], bool] | None = None):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = f()
+        best = min(best, time.perf_counter() - start)
+        if should_stop is not None and should_stop():
+            break
+    return result, best * 1000
+
+
+def fits_rle_v1(img: np.ndarray) -> bool:
+    # Version 1 stores every value as an unsigned 16-bit integer
+    if img.size == 0:
+        return True
+    if img.min() < 0 or img.max() > np.iinfo(RLE_ENTRY_DTYPE["value"]).max:
+        return False
+    return np.issubdtype(img.dtype, np.integer) or bool(np.all(np.mod(img, 1) == 0))
+
+
+def measure_codecs(img: np.ndarray, repeats: int = 3, should_stop: Callable[[], bool] | None = None):
+    # Yields (codec, size in bytes, encode ms, decode ms) per codec, all None where the codec can't store the image.
+    # should_stop is asked after every encode and decode, measuring ends as soon as it returns True.
+    height, width = img.shape[:2]
+    gray = img.ndim == 2 or img.shape[2] == 1
+    v1 = gray and fits_rle_v1(img)
+    v2 = img.dtype in RLE_V2_DTYPES
+    binary = v2 and is_binary_array(img)
+
+    def encode_png(level):
+        ok, buffer = cv.imencode(".png", img, [cv.IMWRITE_PNG_COMPRESSION, level])
+        if not ok:
+            raise ValueError("PNG encoding failed!")
+        return buffer
+
+    def encode_npy():
+        buffer = io.BytesIO()
+        np.save(buffer, img)
+        return buffer.getvalue()
+
+    codecs = [
+        ("RLE v1", v1, lambda: make_binary_rle_arrays(*run_lengths(img), height, width), parse_binary_rle),
+        ("RLE v2", v2, lambda: make_rle_v2(img, encoding=RLEEncoding.RUNS), parse_rle_v2),
+        ("RLE v2 (binary)", binary, lambda: make_rle_v2(img, encoding=RLEEncoding.BINARY), parse_rle_v2),
+        ("RLE v2 + zlib 6", v2, lambda: make_rle_v2(img, compression=RLECompression.ZLIB), parse_rle_v2),
+        ("RLE v2 + LZMA 6", v2, lambda: make_rle_v2(img, compression=RLECompression.LZMA), parse_rle_v2)
+    ]
+    codecs += [(f"PNG (level {level})", True, lambda level=level: encode_png(level),
+                lambda buffer: cv.imdecode(buffer, cv.IMREAD_UNCHANGED)) for level in PNG_BENCHMARK_LEVELS]
+    codecs.append(("NPY", True, encode_npy, lambda data: np.load(io.BytesIO(data))))
+
+    for name, supported, encode, decode in codecs:
+        if not supported:
+            yield name, None, None, None
+            continue
+
+        encoded, encode_ms = _timed(encode, repeats, should_stop)
+        if should_stop is not None and should_stop():
+            return
+        _, decode_ms = _timed(lambda: decode(encoded), repeats, should_stop)
+        if should_stop is not None and should_stop():
+            return
+        yield name, len(encoded), encode_ms, decode_ms
@@ -4,7 +4,7 @@ import numpy as np
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap, QImage, QIcon, QPalette
 from PyQt5.QtWidgets import QMainWindow, QVBoxLayout, QLabel, QMenuBar, QAction, QWidget, QStatusBar, QMessageBox, \
-    QFileDialog
+    QFileDialog, QProgressDialog, QApplication
 
 from error_box import ErrorBox
 from histogram_window import HistogramWindow
@@ -12,6 +12,7 @@ from image import Image, ColorModes
 from image_utils import structuring_element
 from info_box import InfoBox
 from object_traits_window import ObjectTraitsWindow
+from threshold_explorer_window import ThresholdExplorerWindow
 from utils import bresenham
 from widgets.scale_slider import ScaleSlider
 from window_manager import WINDOW_MANAGER
@@ -19,6 +20,9 @@ from window_manager import WINDOW_MANAGER
 LMIN = 0
 LMAX = 255
 
+# How long the chosen convolution path stays in the status bar
+CONVOLUTION_PLAN_MESSAGE_MS = 10000
+
 
 class ImageWindow(QMainWindow):
     def __init__(self, image: Image):
@@ -180,6 +184,10 @@ class ImageWindow(QMainWindow):
         median_action.triggered.connect(self.median)
         self.neighb_menu.addAction(median_action)
 
+        rank_filter_action = QAction("Rank Filter", self)
+        rank_filter_action.triggered.connect(self.rank_filter)
+        self.neighb_menu.addAction(rank_filter_action)
+
         self.neighb_menu.addSeparator()
 
         convolve_action = QAction("Convolve", self)
@@ -282,6 +290,10 @@ class ImageWindow(QMainWindow):
         otsu_thresholding_action.triggered.connect(self.otsu_thresholding)
         self.segmentation_menu.addAction(otsu_thresholding_action)
 
+        threshold_explorer_action = QAction("Threshold Explorer", self)
+        threshold_explorer_action.triggered.connect(self.display_threshold_explorer)
+        self.segmentation_menu.addAction(threshold_explorer_action)
+
         self.segmentation_menu.addSeparator()
 
         grabcut_rect_action = QAction("GrabCut (Rect)", self)
@@ -353,6 +365,7 @@ class ImageWindow(QMainWindow):
         """)
 
         self.histogram_window = None
+        self.threshold_explorer_window = None
         self.refresh_image()
 
     @staticmethod
@@ -364,7 +377,7 @@ class ImageWindow(QMainWindow):
 
     @staticmethod
     def from_numpy(arr: np.ndarray, name: str) -> "ImageWindow":
-        new_image = Image.from_numpy(arr.copy(), name)
+        new_image = Image.from_numpy(arr, name)
         new_window = ImageWindow(new_image)
 
         return new_window
@@ -372,6 +385,8 @@ class ImageWindow(QMainWindow):
     def closeEvent(self, event):
         if self.histogram_window is not None:
             self.histogram_window.close()
+        if self.threshold_explorer_window is not None:
+            self.threshold_explorer_window.close()
         event.accept()
         WINDOW_MANAGER.remove_window(self)
 
@@ -382,6 +397,10 @@ class ImageWindow(QMainWindow):
         if not self.image.is_gray:
             raise Exception("Image is not a grayscale image")
 
+    def check_8bit(self):
+        if not self.image.is_8bit:
+            raise Exception("Image does not have 8-bit pixels")
+
     def check_binary(self):
         if not self.image.is_binary:
             raise Exception("Image is not a binary image")
@@ -409,6 +428,12 @@ class ImageWindow(QMainWindow):
             WINDOW_MANAGER.remove_window(self.histogram_window)
             self.histogram_window = None
 
+        if self.threshold_explorer_window is not None:
+            if is_grayscale and self.image.is_8bit:
+                self.threshold_explorer_window.update_data()
+            else:
+                self.threshold_explorer_window.close()
+
     def slider_changed(self, value):
         percent = self.scale_slider.value
         self.current_zoom = percent
@@ -523,6 +548,16 @@ class ImageWindow(QMainWindow):
         except Exception as error:
             ErrorBox(error)
 
+    def display_threshold_explorer(self):
+        try:
+            self.check_gray()
+            self.check_8bit()
+            if self.threshold_explorer_window is None:
+                self.threshold_explorer_window = ThresholdExplorerWindow(self)
+            self.threshold_explorer_window.show()
+        except Exception as error:
+            ErrorBox(error)
+
     def equalize_histogram(self):
         try:
             self.check_gray()
@@ -608,8 +643,8 @@ class ImageWindow(QMainWindow):
             result = SobelForm.show_dialog(self)
             if result is None:
                 return
-            kernel_size, ddepth, padding = result
-            self.image.sobel(kernel_size, ddepth, padding)
+            kernel_size, ddepth, padding, output = result
+            self.image.sobel(kernel_size, ddepth, padding, output)
             self.refresh_image()
         except Exception as error:
             ErrorBox(error)
@@ -622,8 +657,13 @@ class ImageWindow(QMainWindow):
             result = PrewittForm.show_dialog(self)
             if result is None:
                 return
-            kernel, ddepth, padding = result
-            self.image.convolve(kernel, ddepth, padding)
+            kernel, ddepth, padding, compass = result
+            if compass:
+                directions = self.image.compass_prewitt(ddepth, padding)
+                new_window = ImageWindow(directions)
+                new_window.show()
+            else:
+                self.image.convolve(kernel, ddepth, padding)
             self.refresh_image()
         except Exception as error:
             ErrorBox(error)
@@ -650,8 +690,8 @@ class ImageWindow(QMainWindow):
             result = CannyForm.show_dialog(self)
             if result is None:
                 return
-            th1, th2 = result
-            self.image.canny(th1, th2)
+            th1, th2, blur_size = result
+            self.image.canny(th1, th2, blur_size)
             self.refresh_image()
         except Exception as error:
             ErrorBox(error)
@@ -679,8 +719,9 @@ class ImageWindow(QMainWindow):
             if result is None:
                 return
             kernel, ddepth, padding, should_normalize = result
-            self.image.convolve(kernel, ddepth, padding, should_normalize)
+            plan = self.image.convolve(kernel, ddepth, padding, should_normalize)
             self.refresh_image()
+            self.status_bar.showMessage(f"Convolution: {plan}", CONVOLUTION_PLAN_MESSAGE_MS)
         except Exception as error:
             ErrorBox(error)
 
@@ -692,9 +733,10 @@ class ImageWindow(QMainWindow):
             result = TwoStageFilterForm.show_dialog(self)
             if result is None:
                 return
-            kernel, ddepth, padding, should_normalize = result
-            self.image.convolve(kernel, ddepth, padding, should_normalize)
+            filter1, filter2, ddepth, padding, should_normalize, should_verify_borders = result
+            plan = self.image.filter_chain([filter1, filter2], ddepth, padding, should_normalize, should_verify_borders)
             self.refresh_image()
+            self.status_bar.showMessage(f"Convolution: {plan}", CONVOLUTION_PLAN_MESSAGE_MS)
         except Exception as error:
             ErrorBox(error)
 
@@ -710,6 +752,18 @@ class ImageWindow(QMainWindow):
         except Exception as error:
             ErrorBox(error)
 
+    def rank_filter(self):
+        from forms.rank_filter_form import RankFilterForm
+
+        try:
+            result = RankFilterForm.show_dialog(self)
+            if result is None: return
+            width, height, percentile, padding = result
+            self.image.rank_filter(width, height, percentile, padding)
+            self.refresh_image()
+        except Exception as error:
+            ErrorBox(error)
+
     def add_image(self):
         from image_arithmetic import add_image
         try:
@@ -822,15 +876,29 @@ class ImageWindow(QMainWindow):
             ErrorBox(error)
 
     def skeletonize(self):
-        from forms.morphology_form import MorphologyForm
+        from forms.skeletonization_form import SkeletonizationForm
 
         try:
             self.check_binary()
-            result = MorphologyForm.show_dialog("Skeletonization", self)
+            result = SkeletonizationForm.show_dialog(self)
             if result is None: return
-            shape, size, padding = result
+            shape, size, padding, method, max_iterations = result
             kernel = structuring_element(shape, size)
-            self.image.skeletonize(kernel, padding)
+
+            progress_dialog = QProgressDialog("Skeletonizing...", "Stop", 0, 0, self)
+            progress_dialog.setWindowModality(Qt.WindowModal)
+            progress_dialog.setMinimumDuration(500)
+            initial = max(self.image.foreground_count, 1)
+
+            def progress(iteration: int, remaining: int) -> bool:
+                progress_dialog.setMaximum(initial)
+                progress_dialog.setValue(initial - remaining)
+                progress_dialog.setLabelText(f"Iteration {iteration}, {remaining} pixels left")
+                QApplication.processEvents()
+                return not progress_dialog.wasCanceled()
+
+            self.image.skeletonize(kernel, padding, method=method, max_iterations=max_iterations, progress=progress)
+            progress_dialog.close()
             self.refresh_image()
         except Exception as error:
             ErrorBox(error)
@@ -1075,7 +1143,6 @@ class ImageWindow(QMainWindow):
     def save_rle(self):
         from rle_window import RLEWindow
         try:
-            self.check_gray()
             rle_window = RLEWindow(self.image, self)
             rle_window.show()
 
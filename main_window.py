@@ -5,10 +5,14 @@ from PyQt5.QtWidgets import QMainWindow, QMenuBar, QAction, QMessageBox, QFileDi
 
 import image_arithmetic
 from error_box import ErrorBox
-from image_utils import parse_binary_rle
+from image import Image
+from image_utils import read_rle_header, load_rle
 from image_window import ImageWindow
+from info_box import InfoBox
 from window_manager import WINDOW_MANAGER
 
+RLE_PREVIEW_PIXELS = 1 << 28
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -176,11 +180,19 @@ class MainWindow(QMainWindow):
         try:
             path = self.open_file_dialog(filters)
             if path is not None:
-                with open(path, "rb") as f:
-                    rle_bytes = bytearray(f.read())
-                rle_img = parse_binary_rle(rle_bytes)
                 name, _ = os.path.splitext(os.path.basename(path))
-                imgwin = ImageWindow.from_numpy(rle_img, name)
+                height, width, color_mode = read_rle_header(path)
+
+                # Huge images are opened partially, decoding stops after the rows that fit
+                row_stop = None
+                if height * width > RLE_PREVIEW_PIXELS:
+                    row_stop = max(1, RLE_PREVIEW_PIXELS // width)
+                    name = f"{name} (rows 0-{row_stop})"
+                    InfoBox("Open (RLE)", f"The image is too large, only the first {row_stop} of {height} rows "
+                                          f"have been decoded.")
+
+                rle_img = load_rle(path, row_stop=row_stop)
+                imgwin = ImageWindow(Image.from_numpy(rle_img, name, copy=False, color_mode=color_mode))
                 imgwin.show()
         except Exception as e:
             ErrorBox("Something went wrong!")
@@ -0,0 +1,164 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2 as cv
+import numpy as np
+from scipy import ndimage
+
+# medianBlur handles 8-bit images at any size (a sorting network up to 5, a constant-time sliding histogram above),
+# these depths only at sizes 3 and 5
+MEDIAN_BLUR_SMALL_DEPTHS = [np.dtype(np.uint16), np.dtype(np.int16), np.dtype(np.float32)]
+MEDIAN_BLUR_SMALL_MAX_SIZE = 5
+
+# medianBlur itself extends the image by replicating its edges
+MEDIAN_BLUR_BORDER = cv.BORDER_REPLICATE
+
+# Rank filters run over horizontal strips, each padded with the rows its windows reach into
+RANK_FILTER_STRIP_ROWS = 256
+
+# Decomposition costs one box filter per grey level, sorting grows with the window. Measured at 2000x2000:
+# 3x3 windows sort faster at any number of levels, windows up to 5x5 from about 128 levels on
+RANK_TINY_WINDOW_AREA = 9
+RANK_SMALL_WINDOW_AREA = 25
+RANK_SMALL_WINDOW_MIN_LEVELS = 128
+
+SCIPY_BORDER_MODES = {
+    cv.BORDER_CONSTANT: "constant",
+    cv.BORDER_ISOLATED: "constant",
+    cv.BORDER_REPLICATE: "nearest",
+    cv.BORDER_REFLECT: "reflect",
+    cv.BORDER_REFLECT_101: "mirror",
+    cv.BORDER_WRAP: "wrap"
+}
+
+
+def _uses_median_blur(img: np.ndarray, size: int) -> bool:
+    return img.dtype == np.uint8 or (img.dtype in MEDIAN_BLUR_SMALL_DEPTHS and size <= MEDIAN_BLUR_SMALL_MAX_SIZE)
+
+
+def _median_blur(img: np.ndarray, size: int, border_type: int) -> np.ndarray:
+    if border_type == MEDIAN_BLUR_BORDER:
+        return cv.medianBlur(img, size)
+
+    # Other borders need the image padded; filtering only thin padded strips along the edges was measured slower,
+    # as medianBlur's per-call setup grows with the size
+    radius = size // 2
+    padded = cv.copyMakeBorder(img, radius, radius, radius, radius, borderType=border_type)
+    return cv.medianBlur(padded, size)[radius:-radius, radius:-radius]
+
+
+def median_filter(img: np.ndarray, size: int, border_type: int) -> np.ndarray:
+    if not (size > 1 and size % 2 == 1):
+        raise ValueError("Invalid size!")
+
+    if _uses_median_blur(img, size):
+        return _median_blur(img, size, border_type)
+
+    if border_type not in SCIPY_BORDER_MODES:
+        raise NotImplementedError(f"Unsupported border type: {border_type}")
+
+    # Other depths and sizes: a generic rank filter, each channel on its own
+    window = (size, size) + (1,) * (img.ndim - 2)
+    return ndimage.median_filter(img, size=window, mode=SCIPY_BORDER_MODES[border_type], cval=0)
+
+
+def percentile_rank(window_size: int, percentile: float) -> int:
+    # Same convention as scipy's percentile_filter: 0 is the minimum, window_size - 1 the maximum
+    return min(int(window_size * percentile / 100), window_size - 1)
+
+
+def _padded_strip(img: np.ndarray, top: int, bottom: int, radius_y: int, radius_x: int, border_type: int) -> np.ndarray:
+    if border_type == cv.BORDER_WRAP:
+        # Rows past the image edges come from its other end, not from the strip's
+        rows = np.arange(top - radius_y, bottom + radius_y) % img.shape[0]
+        return cv.copyMakeBorder(img[rows], 0, 0, radius_x, radius_x, borderType=border_type)
+
+    # Neighbouring rows serve as the halo, only the image edges are extended with the border
+    top_halo = min(top, radius_y)
+    bottom_halo = min(img.shape[0] - bottom, radius_y)
+    part = img[top - top_halo: bottom + bottom_halo]
+    return cv.copyMakeBorder(part, radius_y - top_halo, radius_y - bottom_halo, radius_x, radius_x,
+                             borderType=border_type)
+
+
+def _sorts_directly(window_size: int, level_count: int) -> bool:
+    return window_size <= RANK_TINY_WINDOW_AREA \
+        or (window_size <= RANK_SMALL_WINDOW_AREA and level_count >= RANK_SMALL_WINDOW_MIN_LEVELS)
+
+
+def _threshold_decomposition(padded: np.ndarray, width: int, height: int, rank: int) -> np.ndarray:
+    # The rank-th smallest value of a window is at least a level if at most rank of its pixels lie below that level,
+    # so the result is built from one unnormalized box filter per grey level present
+    out_height = padded.shape[0] - (height - 1)
+    out_width = padded.shape[1] - (width - 1)
+    radius_y, radius_x = height // 2, width // 2
+
+    levels = np.flatnonzero(np.bincount(padded.ravel(), minlength=256))
+    result = np.full((out_height, out_width), levels[0], dtype=np.uint8)
+
+    below = np.empty_like(padded)
+    counts = np.empty(padded.shape, dtype=np.int32)
+    selected = np.empty_like(result)
+
+    for previous, level in zip(levels[:-1], levels[1:]):
+        cv.threshold(padded, int(level) - 1, 1, cv.THRESH_BINARY_INV, dst=below)
+        cv.boxFilter(below, cv.CV_32S, (width, height), dst=counts, normalize=False, borderType=cv.BORDER_CONSTANT)
+        window_counts = counts[radius_y: radius_y + out_height, radius_x: radius_x + out_width]
+        cv.compare(window_counts, rank, cv.CMP_LE, dst=selected)
+        cv.add(result, int(level - previous), dst=result, mask=selected)
+
+    return result
+
+
+def _rank_filter_padded(padded: np.ndarray, width: int, height: int, rank: int) -> np.ndarray:
+    radius_y, radius_x = height // 2, width // 2
+    crop = (slice(radius_y, padded.shape[0] - radius_y), slice(radius_x, padded.shape[1] - radius_x))
+    window_size = width * height
+
+    if rank == 0 or rank == window_size - 1:
+        # Minimum and maximum are erosion and dilation by the rectangle
+        kernel = np.ones((height, width), dtype=np.uint8)
+        morph = cv.erode if rank == 0 else cv.dilate
+        return morph(padded, kernel)[crop]
+
+    if padded.dtype == np.uint8:
+        level_count = np.count_nonzero(np.bincount(padded.ravel(), minlength=256))
+        if not _sorts_directly(window_size, level_count):
+            return _threshold_decomposition(padded, width, height, rank)
+
+    return ndimage.rank_filter(padded, rank, size=(height, width))[crop]
+
+
+def rank_filter(img: np.ndarray,
+                width: int,
+                height: int,
+                percentile: float,
+                border_type: int,
+                workers: int | None = None,
+                strip_rows: int = RANK_FILTER_STRIP_ROWS) -> np.ndarray:
+    if width < 1 or height < 1 or width % 2 == 0 or height % 2 == 0:
+        raise ValueError("Window sides must be odd!")
+    if not 0 <= percentile <= 100:
+        raise ValueError("Percentile must be between 0 and 100!")
+    if strip_rows < 1:
+        raise ValueError("Strips must be at least one row high!")
+
+    rank = percentile_rank(width * height, percentile)
+    radius_y, radius_x = height // 2, width // 2
+    img_height, img_width = img.shape[:2]
+
+    result = np.empty_like(img)
+    result_channels = result.reshape(img_height, img_width, -1)
+
+    def filter_strip(top: int):
+        bottom = min(top + strip_rows, img_height)
+        padded = _padded_strip(img, top, bottom, radius_y, radius_x, border_type)
+        padded = padded.reshape(padded.shape[0], padded.shape[1], -1)
+        for channel in range(padded.shape[2]):
+            plane = np.ascontiguousarray(padded[..., channel])
+            result_channels[top:bottom, :, channel] = _rank_filter_padded(plane, width, height, rank)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        list(executor.map(filter_strip, range(0, img_height, strip_rows)))
+
+    return result
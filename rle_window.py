@@ -1,16 +1,40 @@
+import csv
 import os
 
 import numpy as np
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTableWidget, QGroupBox, QTableView, QAbstractItemView, \
-    QTableWidgetItem, QHeaderView, QPushButton, QFileDialog
+    QTableWidgetItem, QHeaderView, QPushButton, QFileDialog, QFormLayout, QComboBox, QSpinBox
 
 from error_box import ErrorBox
 from image import Image
-from image_utils import make_binary_rle
+from image_utils import make_binary_rle_arrays, make_rle_v2, measure_codecs, RLEFormat, RLECompression
 from info_box import InfoBox
+from utils import run_lengths
 from window_manager import WINDOW_MANAGER
 
+# Measurement threads of closed windows are kept alive here until they notice the interruption and end
+_FINISHING_THREADS: set[QThread] = set()
+
+
+class CodecMeasurementThread(QThread):
+    measured = pyqtSignal(tuple)
+    failed = pyqtSignal(str)
+
+    def __init__(self, pixels: np.ndarray):
+        super().__init__()
+        self.pixels = pixels
+
+    def run(self):
+        # An exception escaping run() would abort the application, so it is handed over to the GUI thread instead
+        try:
+            for row in measure_codecs(self.pixels, should_stop=self.isInterruptionRequested):
+                if self.isInterruptionRequested():
+                    return
+                self.measured.emit(row)
+        except Exception as error:
+            self.failed.emit(str(error))
+
 
 class RLEWindow(QMainWindow):
     def __init__(self, image: Image, parent: QMainWindow | None = None):
@@ -18,6 +42,11 @@ class RLEWindow(QMainWindow):
         WINDOW_MANAGER.add_window(self)
         self.parent_window = parent
         self.image = image
+        self.format_options = [RLEFormat.V2, RLEFormat.V1]
+        self.rle_format = self.format_options[0]
+        self.compression_options = [RLECompression.NONE, RLECompression.ZLIB, RLECompression.LZMA]
+        self.compression = self.compression_options[0]
+        self.compression_level = 6
 
         title = "RLE"
         if parent is not None:
@@ -49,15 +78,69 @@ class RLEWindow(QMainWindow):
         self.data_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.data_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
 
+        self.codec_group = QGroupBox("Codecs (measuring...)")
+        self.codec_group_layout = QVBoxLayout()
+        self.codec_group.setLayout(self.codec_group_layout)
+        self.layout.addWidget(self.codec_group)
+
+        self.codec_table = QTableWidget()
+        self.codec_group_layout.addWidget(self.codec_table)
+
+        self.codec_table.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.codec_table.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+        self.codec_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.codec_table.setSelectionBehavior(QTableView.SelectRows)
+
+        self.codec_headers = ["Codec", "Size (B)", "Ratio", "Encode (ms)", "Decode (ms)"]
+        self.codec_table.setColumnCount(len(self.codec_headers))
+        self.codec_table.setHorizontalHeaderLabels(self.codec_headers)
+        self.codec_table.verticalHeader().hide()
+        self.codec_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.codec_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        self.export_button = QPushButton("EXPORT CSV")
+        self.export_button.setEnabled(False)
+        self.export_button.clicked.connect(self.export_csv)
+        self.codec_group_layout.addWidget(self.export_button)
+
+        form_widget = QWidget()
+        form_layout = QFormLayout()
+        form_widget.setLayout(form_layout)
+        self.layout.addWidget(form_widget)
+
+        self.format_combo_box = QComboBox()
+        self.format_combo_box.addItems(["V2 (Row-indexed)", "V1 (Flat)"])
+        self.format_combo_box.currentIndexChanged.connect(self.format_idx_changed)
+        form_layout.addRow("Format", self.format_combo_box)
+
+        self.compression_combo_box = QComboBox()
+        self.compression_combo_box.addItems(["None", "zlib", "LZMA"])
+        self.compression_combo_box.currentIndexChanged.connect(self.compression_idx_changed)
+        form_layout.addRow("Compression (V2)", self.compression_combo_box)
+
+        self.level_spin_box = QSpinBox()
+        self.level_spin_box.setMinimum(0)
+        self.level_spin_box.setMaximum(9)
+        self.level_spin_box.setValue(self.compression_level)
+        self.level_spin_box.valueChanged.connect(self.level_value_changed)
+        form_layout.addRow("Compression Level", self.level_spin_box)
+
         self.save_button = QPushButton("SAVE RLE")
         self.save_button.clicked.connect(self.save_rle)
         self.layout.addWidget(self.save_button)
 
         # Post-render activities
 
-        self.rle = self.image.rle_encode_img()
-        self.rle_vals = np.array([pair[0] for pair in self.rle], dtype=np.uint8)
-        self.rle_counts = np.array([pair[1] for pair in self.rle], dtype=np.uint32)
+        if self.image.is_gray:
+            rle_vals, rle_counts = self.image.rle_encode_arrays()
+        else:
+            # Planar: the runs of each channel, one after another
+            img = self.image.img
+            planes = [run_lengths(np.ascontiguousarray(img[..., channel])) for channel in range(img.shape[2])]
+            rle_vals = np.concatenate([values for values, _ in planes])
+            rle_counts = np.concatenate([counts for _, counts in planes])
+        self.rle_vals = rle_vals.astype(np.uint8)
+        self.rle_counts = rle_counts.astype(np.uint32)
         self.rle_header = np.array([self.image.height, self.image.width], dtype=np.uint32)
 
         self.size_bytes = self.image.size_bytes
@@ -66,7 +149,16 @@ class RLEWindow(QMainWindow):
         self.level_of_compression = self.size_bytes / self.rle_size_bytes
 
         self.generate_table()
-        self.setFixedSize(self.size().width() // 2, self.size().width() // 2)
+        self.setFixedSize(self.size().width() // 2, self.size().width() * 3 // 4)
+
+        # The copy freezes the pixels, so edits made while measuring don't reach the thread
+        self.codec_rows = []
+        self.codec_error = None
+        self.codec_thread = CodecMeasurementThread(self.image.copy().img)
+        self.codec_thread.measured.connect(self.add_codec_row)
+        self.codec_thread.failed.connect(self.codecs_failed)
+        self.codec_thread.finished.connect(self.codecs_measured)
+        self.codec_thread.start()
 
     def generate_table(self):
         self.data_table.clear()
@@ -88,16 +180,70 @@ class RLEWindow(QMainWindow):
 
         self.data_table.update()
 
+    def add_codec_row(self, row: tuple):
+        name, size, encode_ms, decode_ms = row
+        if size is None:
+            cells = [name, "N/A", "N/A", "N/A", "N/A"]
+        else:
+            cells = [name, size, f"{self.size_bytes / size:.3f}", f"{encode_ms:.2f}", f"{decode_ms:.2f}"]
+
+        self.codec_rows.append(cells)
+        idx = self.codec_table.rowCount()
+        self.codec_table.setRowCount(idx + 1)
+        for col, cell in enumerate(cells):
+            self.codec_table.setItem(idx, col, QTableWidgetItem(str(cell)))
+
+    def codecs_measured(self):
+        if self.codec_error is not None:
+            self.codec_group.setTitle("Codecs (measurement failed)")
+            return
+        self.codec_group.setTitle("Codecs")
+        self.export_button.setEnabled(True)
+
+    def codecs_failed(self, message: str):
+        self.codec_error = message
+        ErrorBox(message)
+
+    def export_csv(self):
+        try:
+            path = self._save_file_dialog(["CSV Files (*.csv)"], "csv", "_codecs")
+            if path is not None:
+                with open(path, "w", newline="") as csv_file:
+                    writer = csv.writer(csv_file)
+                    writer.writerow(self.codec_headers)
+                    writer.writerows(self.codec_rows)
+                InfoBox("File saved successfully!")
+        except Exception as e:
+            ErrorBox("Something went wrong!")
+
+    def format_idx_changed(self, idx):
+        self.rle_format = self.format_options[idx]
+
+    def compression_idx_changed(self, idx):
+        self.compression = self.compression_options[idx]
+
+    def level_value_changed(self, value):
+        self.compression_level = value
+
     def closeEvent(self, event):
+        # Waiting here could hang the GUI until a long encode ends, so the thread is left to finish on its own
+        thread = self.codec_thread
+        thread.requestInterruption()
+        if thread.isRunning():
+            thread.measured.disconnect()
+            thread.failed.disconnect()
+            thread.finished.disconnect(self.codecs_measured)
+            _FINISHING_THREADS.add(thread)
+            thread.finished.connect(lambda: _FINISHING_THREADS.discard(thread))
         WINDOW_MANAGER.remove_window(self)
         event.accept()
 
-    def _save_file_dialog(self):
+    def _save_file_dialog(self, filters: list[str] | None = None, suffix: str = "", name_suffix: str = ""):
         dlg = QFileDialog()
         dlg.setAcceptMode(QFileDialog.AcceptSave)
         dlg.setFileMode(QFileDialog.AnyFile)
 
-        filters = [
+        filters = filters if filters is not None else [
             "All Files (*)"
         ]
 
@@ -106,8 +252,8 @@ class RLEWindow(QMainWindow):
         file_name, ext = os.path.splitext(self.image.name)
 
         dlg.selectNameFilter(filters[-1])
-        dlg.setDefaultSuffix("")
-        dlg.selectFile(file_name)
+        dlg.setDefaultSuffix(suffix)
+        dlg.selectFile(file_name + name_suffix)
 
         dlg.exec()
 
@@ -120,9 +266,17 @@ class RLEWindow(QMainWindow):
 
     def save_rle(self):
         try:
-            binary_rle = make_binary_rle(self.rle, int(self.image.height), int(self.image.width))
+            if self.rle_format == RLEFormat.V2:
+                binary_rle = make_rle_v2(self.image.img, compression=self.compression,
+                                         level=self.compression_level, color_mode=self.image.color_mode)
+            else:
+                if not self.image.is_gray:
+                    raise ValueError("The V1 format only supports grayscale images!")
+                binary_rle = make_binary_rle_arrays(self.rle_vals, self.rle_counts,
+                                                    int(self.image.height), int(self.image.width))
         except Exception as e:
             ErrorBox(e)
+            return
 
         try:
             path = self._save_file_dialog()
@@ -0,0 +1,143 @@
+from enum import Enum
+from typing import Callable
+
+import cv2 as cv
+import numpy as np
+
+LMIN = 0
+LMAX = 255
+
+
+class SkeletonMethod(Enum):
+    MORPHOLOGICAL = "MORPHOLOGICAL"
+    ZHANG_SUEN = "ZHANG_SUEN"
+
+
+# Called after every iteration with the iteration number and the foreground left to process,
+# returning False stops the engine early
+SkeletonProgress = Callable[[int, int], bool | None]
+
+
+def _zhang_suen_luts() -> tuple[np.ndarray, np.ndarray]:
+    codes = np.arange(256)
+    # Bit i of a neighbourhood code is P(i + 2), the neighbours running N, NE, E, SE, S, SW, W, NW
+    p = [(codes >> bit) & 1 for bit in range(8)]  # p[0] is P2, ..., p[7] is P9
+
+    neighbours = sum(p)
+    transitions = sum((p[bit] == 0) & (p[(bit + 1) % 8] == 1) for bit in range(8))
+    removable = (neighbours >= 2) & (neighbours <= 6) & (transitions == 1)
+
+    p2, p4, p6, p8 = p[0], p[2], p[4], p[6]
+    first = removable & (p2 * p4 * p6 == 0) & (p4 * p6 * p8 == 0)
+    second = removable & (p2 * p4 * p8 == 0) & (p2 * p6 * p8 == 0)
+
+    return first.astype(np.uint8), second.astype(np.uint8)
+
+
+ZHANG_SUEN_LUTS = _zhang_suen_luts()
+
+
+def morphological_skeleton(img: np.ndarray,
+                           kernel: np.ndarray,
+                           border_type: int,
+                           anchor: tuple[int, int] = (-1, -1),
+                           max_iterations: int | None = None,
+                           progress: SkeletonProgress | None = None) -> np.ndarray:
+    kernel = np.asarray(kernel, dtype=np.uint8)
+
+    # All buffers are allocated once, every step writes into one of them
+    current = img.copy()
+    eroded = np.empty_like(img)
+    opened = np.empty_like(img)
+    skeleton = np.zeros_like(img)
+
+    iteration = 0
+    remaining = cv.countNonZero(current)
+    while remaining > 0:
+        if max_iterations is not None and iteration >= max_iterations:
+            # Cut short: what has not been eroded away yet is kept as it is
+            cv.bitwise_or(skeleton, current, dst=skeleton)
+            break
+
+        cv.erode(current, kernel, dst=eroded, anchor=anchor, borderType=border_type)
+        cv.dilate(eroded, kernel, dst=opened, anchor=anchor, borderType=border_type)
+        cv.subtract(current, opened, dst=opened)
+        cv.bitwise_or(skeleton, opened, dst=skeleton)
+        current, eroded = eroded, current
+
+        iteration += 1
+        remaining = cv.countNonZero(current)
+        if progress is not None and progress(iteration, remaining) is False:
+            cv.bitwise_or(skeleton, current, dst=skeleton)
+            break
+
+    return skeleton
+
+
+def zhang_suen_thinning(img: np.ndarray,
+                        max_iterations: int | None = None,
+                        progress: SkeletonProgress | None = None) -> np.ndarray:
+    height, width = img.shape[:2]
+    stride = width + 2
+
+    # 0/1 pixels with a background frame, so that every neighbour of an image pixel has a flat index
+    bits = np.zeros((height + 2, width + 2), dtype=np.uint8)
+    bits[1:-1, 1:-1] = img.reshape(height, width) != LMIN
+    flat_bits = bits.reshape(-1)
+    offsets = np.array([-stride, -stride + 1, 1, stride + 1, stride, stride - 1, -1, -stride - 1])
+
+    # A pixel's verdict in a sub-iteration only changes with its neighbourhood, so each sub-iteration looks at the
+    # pixels next to earlier deletions only. Interior pixels are never removable, the first pass covers the boundary.
+    interior = cv.erode(bits, np.ones((3, 3), dtype=np.uint8), borderType=cv.BORDER_CONSTANT, borderValue=0)
+    boundary = np.flatnonzero(bits > interior)
+    dirty = [boundary, boundary]
+    remaining = int(flat_bits.sum(dtype=np.int64))
+
+    iteration = 0
+    while max_iterations is None or iteration < max_iterations:
+        changed = 0
+        for step, lut in enumerate(ZHANG_SUEN_LUTS):
+            candidates = dirty[step]
+            candidates = candidates[flat_bits[candidates] == 1]
+
+            codes = np.zeros(candidates.size, dtype=np.uint8)
+            for bit, offset in enumerate(offsets):
+                codes |= flat_bits[candidates + offset] << bit
+
+            deleted = candidates[lut[codes] == 1]
+            flat_bits[deleted] = 0
+            changed += deleted.size
+
+            neighbours = np.unique((deleted[:, np.newaxis] + offsets).ravel())
+            neighbours = neighbours[flat_bits[neighbours] == 1]
+            dirty[step] = neighbours
+            dirty[1 - step] = np.union1d(dirty[1 - step], neighbours)
+
+        iteration += 1
+        remaining -= changed
+        if changed == 0:
+            break
+        if progress is not None and progress(iteration, remaining) is False:
+            break
+
+    result = bits[1:-1, 1:-1] * np.uint8(LMAX)
+    return result
+
+
+def skeletonize(img: np.ndarray,
+                kernel: np.ndarray,
+                border_type: int,
+                anchor: tuple[int, int] = (-1, -1),
+                method: SkeletonMethod = SkeletonMethod.MORPHOLOGICAL,
+                max_iterations: int | None = None,
+                progress: SkeletonProgress | None = None) -> np.ndarray:
+    if max_iterations is not None and max_iterations < 1:
+        raise ValueError("At least one iteration is required!")
+
+    match method:
+        case SkeletonMethod.MORPHOLOGICAL:
+            return morphological_skeleton(img, kernel, border_type, anchor, max_iterations, progress)
+        case SkeletonMethod.ZHANG_SUEN:
+            return zhang_suen_thinning(img, max_iterations, progress)
+
+    raise NotImplementedError(f"Unknown skeletonization method: {method}")
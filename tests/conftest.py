@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing checks with generous floors, see benchmarks/ for the full runs")
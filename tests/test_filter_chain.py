@@ -0,0 +1,66 @@
+import cv2 as cv
+import numpy as np
+import pytest
+
+from convolution import filter_chain, plan_filter_chain, composite_kernel, borders_agree
+from image import Image, DesiredDepth, Padding
+
+ONES = np.ones((3, 3))
+SHARPEN = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float64)
+SKEWED = np.array([[1, 2, 0], [0, 1, 0], [0, 0, 3]], dtype=np.float64)
+
+
+def random_image() -> np.ndarray:
+    return np.random.default_rng(0).integers(0, 256, (200, 240), dtype=np.uint8)
+
+
+def composite_result(img: np.ndarray, filters: list[np.ndarray], ddepth: int, border_type: int) -> np.ndarray:
+    normalizer = max(composite_kernel(filters).sum(), 1)
+    return cv.filter2D(img, ddepth, composite_kernel(filters) / normalizer, borderType=border_type)
+
+
+@pytest.mark.parametrize("filters", [[ONES, SHARPEN], [SKEWED, SHARPEN], [SHARPEN, ONES]])
+@pytest.mark.parametrize("ddepth", [cv.CV_8U, cv.CV_64F])
+@pytest.mark.parametrize("border_type", [padding.value for padding in Padding] + [cv.BORDER_REFLECT_101])
+def test_default_plan_keeps_the_composite_result(filters, ddepth, border_type):
+    img = random_image()
+    normalizer = max(composite_kernel(filters).sum(), 1)
+    result, plan = filter_chain(img, filters, ddepth, border_type, normalizer)
+
+    expected = composite_result(img, filters, ddepth, border_type)
+    tolerance = 1 if ddepth == cv.CV_8U else 1e-9
+    np.testing.assert_allclose(result.astype(np.float64), expected, rtol=0, atol=tolerance)
+
+
+def test_sequential_plan_needs_agreeing_borders():
+    # The cheaper plan for ones then sharpen at F64 is sequential, which only reflected borders reproduce exactly
+    assert plan_filter_chain([ONES, SHARPEN], cv.CV_64F, cv.BORDER_REFLECT, 9).sequential
+    assert not plan_filter_chain([ONES, SHARPEN], cv.CV_64F, cv.BORDER_REPLICATE, 9).sequential
+    assert not plan_filter_chain([ONES, SHARPEN], cv.CV_64F, cv.BORDER_ISOLATED, 9).sequential
+    assert plan_filter_chain([ONES, SHARPEN], cv.CV_64F, cv.BORDER_REPLICATE, 9, exact_borders=False).sequential
+
+
+def test_borders_agree():
+    assert borders_agree([ONES, SHARPEN], cv.BORDER_REFLECT)
+    assert borders_agree([ONES, SHARPEN], cv.BORDER_REFLECT_101)
+    assert not borders_agree([ONES, SHARPEN], cv.BORDER_REPLICATE)
+    assert not borders_agree([SKEWED, SHARPEN], cv.BORDER_REFLECT)
+    assert not borders_agree([np.ones((2, 2)), SHARPEN], cv.BORDER_REFLECT)
+
+
+def test_verification_falls_back_to_the_composite():
+    img = random_image()
+    result, plan = filter_chain(img, [ONES, SHARPEN], cv.CV_64F, cv.BORDER_REPLICATE, 9, verify_borders=True)
+
+    assert not plan.sequential
+    np.testing.assert_allclose(result, composite_result(img, [ONES, SHARPEN], cv.CV_64F, cv.BORDER_REPLICATE),
+                               rtol=0, atol=1e-9)
+
+
+def test_image_defaults():
+    img = random_image()
+    image = Image.from_numpy(img, "chain")
+    image.filter_chain([ONES, SHARPEN], DesiredDepth.F64, Padding.REPLICATE)
+
+    np.testing.assert_allclose(image.img, composite_result(img, [ONES, SHARPEN], cv.CV_64F, cv.BORDER_REPLICATE),
+                               rtol=0, atol=1e-9)
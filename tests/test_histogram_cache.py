@@ -0,0 +1,60 @@
+import numpy as np
+
+from image import Image, histogram_counts
+
+
+def random_image(seed: int = 0) -> Image:
+    pixels = np.random.default_rng(seed).integers(0, 256, (60, 80), dtype=np.uint8)
+    return Image.from_numpy(pixels, "random")
+
+
+def test_repeated_reads_build_one_histogram():
+    image = random_image()
+    assert image.histogram_computations == 0
+
+    histogram = image.histogram
+    for _ in range(5):
+        assert image.histogram is histogram
+    assert image.histogram_computations == 1
+    np.testing.assert_array_equal(histogram.array, histogram_counts(image.img))
+
+
+def test_every_change_rebuilds_once_when_read():
+    image = random_image()
+    image.histogram
+    assert image.histogram_computations == 1
+
+    # Assigning pixels only bumps the generation, the histogram waits until it is read
+    image.img = 255 - image.img
+    image.img = 255 - image.img
+    assert image.histogram_computations == 1
+    image.histogram
+    image.histogram
+    assert image.histogram_computations == 2
+
+    # So does an in-place edit through writable_img
+    image.writable_img()[0, 0] = 7
+    np.testing.assert_array_equal(image.histogram.array, histogram_counts(image.img))
+    assert image.histogram_computations == 3
+
+
+def test_copies_count_their_own_histograms():
+    image = random_image()
+    image.histogram
+    copy = image.copy()
+
+    assert copy.histogram_computations == 0
+    np.testing.assert_array_equal(copy.histogram.array, image.histogram.array)
+    assert copy.histogram_computations == 1
+    assert image.histogram_computations == 1
+
+
+def test_point_op_rebuilds_once():
+    image = random_image()
+    image.histogram
+
+    image.negate()
+    expected = histogram_counts(255 - random_image().img)
+    np.testing.assert_array_equal(image.histogram.array, expected)
+    image.histogram
+    assert image.histogram_computations == 2
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from image import Image
+
+
+def float_image(values) -> Image:
+    return Image.from_numpy(np.array(values, dtype=np.float64).reshape(1, -1), "float")
+
+
+@pytest.mark.parametrize("read_histogram", [False, True])
+def test_float_traits_come_from_the_pixels(read_histogram):
+    # -682.5 and 604.25 fall outside the integer bins a histogram counts
+    image = float_image([-682.5, 0, 12.5, 255, 604.25])
+    if read_histogram:
+        image.histogram
+
+    assert image.min_value == -682.5
+    assert image.max_value == 604.25
+    np.testing.assert_array_equal(image.unique_values, [-682.5, 0, 12.5, 255, 604.25])
+    assert not image.is_binary
+
+
+def test_float_image_with_a_fraction_is_not_binary():
+    image = float_image([0, 255, 0.5, 255])
+    image.histogram
+    assert not image.is_binary
+
+
+def test_float_image_without_integer_levels_can_be_stretched():
+    image = float_image([-3.5, 300.25])
+    image.histogram
+    image.stretch_histogram(0, 255)
+    np.testing.assert_array_equal(image.img.ravel(), [0, 255])
+
+
+def test_traits_follow_the_generation():
+    image = Image.from_numpy(np.array([[0, 255], [255, 0]], dtype=np.uint8), "binary")
+    image.histogram
+    assert image.is_binary
+    assert (image.min_value, image.max_value) == (0, 255)
+
+    image.img = np.array([[3, 200], [200, 3]], dtype=np.uint8)
+    assert not image.is_binary
+    assert (image.min_value, image.max_value) == (3, 200)
+
+    # A copy carries its source's traits until either one changes
+    copy = image.copy()
+    copy.img = np.full((2, 2), 255, dtype=np.uint8)
+    assert (copy.min_value, copy.max_value) == (255, 255)
+    assert (image.min_value, image.max_value) == (3, 200)
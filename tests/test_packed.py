@@ -0,0 +1,103 @@
+import cv2 as cv
+import numpy as np
+import pytest
+
+from image import Image
+from utils import pack_bits, unpack_bits, popcount
+
+LMIN = 0
+LMAX = 255
+# Word boundaries and the widths either side of them, where the row padding bits start or end
+WIDTHS = [1, 7, 8, 63, 64, 65, 127, 128, 130, 200]
+HEIGHT = 11
+
+
+def random_mask(width: int, seed: int, density: float = 0.5) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random((HEIGHT, width)) < density, LMAX, LMIN).astype(np.uint8)
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+@pytest.mark.parametrize("density", [0.0, 0.3, 1.0])
+def test_pack_round_trip(width, density):
+    mask = random_mask(width, width, density)
+    words = pack_bits(mask)
+
+    assert words.dtype == np.dtype("<u8")
+    assert words.shape == (HEIGHT, (width + 63) // 64)
+    np.testing.assert_array_equal(unpack_bits(words, width, LMAX), mask)
+    np.testing.assert_array_equal(unpack_bits(words, width), mask // LMAX)
+    assert popcount(words) == cv.countNonZero(mask)
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_pack_leaves_padding_clear(width):
+    words = pack_bits(np.full((HEIGHT, width), LMAX, dtype=np.uint8))
+    assert popcount(words) == HEIGHT * width
+
+
+@pytest.mark.parametrize("dtype", [np.bool_, np.uint16, np.float64])
+def test_pack_other_dtypes(dtype):
+    mask = random_mask(65, 1)
+    np.testing.assert_array_equal(pack_bits(mask.astype(dtype)), pack_bits(mask))
+
+
+def test_popcount_empty():
+    assert popcount(np.zeros((0, 1), dtype="<u8")) == 0
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+@pytest.mark.parametrize("operation, reference", [
+    (Image.bitwise_and_images, cv.bitwise_and),
+    (Image.bitwise_or_images, cv.bitwise_or),
+    (Image.bitwise_xor_images, cv.bitwise_xor),
+])
+def test_packed_binary_operations(width, operation, reference):
+    mask1 = random_mask(width, 2 * width)
+    mask2 = random_mask(width, 2 * width + 1)
+    result = operation(Image.from_numpy(mask1), Image.from_numpy(mask2), "result")
+
+    expected = reference(mask1, mask2)
+    assert result.is_packed
+    assert result.foreground_count == cv.countNonZero(expected)
+    np.testing.assert_array_equal(result.img, expected)
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_packed_not(width):
+    mask = random_mask(width, width)
+    expected = cv.bitwise_not(mask)
+
+    for result in (Image.bitwise_not_image(Image.from_numpy(mask), "result"), Image.from_numpy(mask).bitwise_not()):
+        assert result.is_packed
+        assert result.foreground_count == cv.countNonZero(expected)
+        np.testing.assert_array_equal(result.img, expected)
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_negate_packed_image(width):
+    mask = random_mask(width, width)
+    image = Image.from_packed(pack_bits(mask), width)
+    image.negate()
+
+    assert image.is_packed
+    assert image.foreground_count == cv.countNonZero(cv.bitwise_not(mask))
+    np.testing.assert_array_equal(image.img, cv.bitwise_not(mask))
+    # A second negation must not pick up the padding bits set by the first one
+    image.negate()
+    np.testing.assert_array_equal(image.packed, pack_bits(mask))
+
+
+def test_non_binary_falls_back_to_pixels():
+    mask = random_mask(65, 3)
+    grey = mask // 2
+    result = Image.bitwise_or_images(Image.from_numpy(mask), Image.from_numpy(grey), "result")
+
+    assert not result.is_packed
+    np.testing.assert_array_equal(result.img, cv.bitwise_or(mask, grey))
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_foreground_count_unpacked(width):
+    mask = random_mask(width, width)
+    assert Image.from_numpy(mask).foreground_count == cv.countNonZero(mask)
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from image import Image
+
+CHAINS = 200
+MAX_CHAIN_LENGTH = 8
+
+
+def random_op(rng: np.random.Generator):
+    match int(rng.integers(8)):
+        case 0:
+            return "negate", lambda image: image.negate()
+        case 1:
+            threshold, inv = int(rng.integers(256)), bool(rng.integers(2))
+            return f"thresholding({threshold}, {inv})", lambda image: image.thresholding(threshold, inv)
+        case 2:
+            inv = bool(rng.integers(2))
+            return f"otsu_thresholding({inv})", lambda image: image.otsu_thresholding(inv)
+        case 3:
+            low, high = sorted(rng.integers(0, 256, 2).tolist())
+            return f"stretch_histogram({low}, {high})", lambda image: image.stretch_histogram(low, high)
+        case 4:
+            return "equalize_histogram", lambda image: image.equalize_histogram()
+        case 5:
+            p1, p2 = sorted(rng.integers(0, 256, 2).tolist())
+            q3, q4 = sorted(rng.integers(0, 256, 2).tolist())
+            return f"stretch_range({p1}, {p2}, {q3}, {q4})", lambda image: image.stretch_range(p1, p2, q3, q4)
+        case 6:
+            levels = int(rng.integers(2, 17))
+            return f"posterize({levels})", lambda image: image.posterize(levels)
+        case _:
+            lut = rng.integers(0, 256, 256, dtype=np.uint8)
+            return "apply_lut(random)", lambda image: image.apply_lut(lut)
+
+
+def run_chain(pixels: np.ndarray, ops, deferred: bool):
+    image = Image.from_numpy(pixels, "chain")
+    # Reading a trait or the histogram in the middle of a chain must not flush the pending table
+    outcomes = []
+    if deferred:
+        with image.deferred_point_ops():
+            for name, op in ops:
+                try:
+                    op(image)
+                    outcomes.append((image.min_value, image.max_value, image.is_binary))
+                except ValueError as error:
+                    outcomes.append(str(error))
+    else:
+        for name, op in ops:
+            try:
+                op(image)
+                outcomes.append((image.min_value, image.max_value, image.is_binary))
+            except ValueError as error:
+                outcomes.append(str(error))
+    return image, outcomes
+
+
+@pytest.mark.parametrize("seed", range(CHAINS))
+def test_deferred_chain_matches_eager(seed):
+    rng = np.random.default_rng(seed)
+    height, width = rng.integers(1, 40, 2)
+    pixels = rng.integers(0, 256, (height, width), dtype=np.uint8)
+    if seed % 4 == 0:
+        # Few grey levels make thresholds and single-valued results common
+        pixels = rng.choice(rng.integers(0, 256, 3), (height, width)).astype(np.uint8)
+    ops = [random_op(rng) for _ in range(rng.integers(1, MAX_CHAIN_LENGTH + 1))]
+
+    eager, eager_outcomes = run_chain(pixels, ops, deferred=False)
+    deferred, deferred_outcomes = run_chain(pixels, ops, deferred=True)
+
+    chain = " -> ".join(name for name, _ in ops)
+    assert deferred_outcomes == eager_outcomes, chain
+    assert not deferred.has_pending_point_ops
+    np.testing.assert_array_equal(deferred.img, eager.img, err_msg=chain)
+    np.testing.assert_array_equal(deferred.histogram.array, eager.histogram.array, err_msg=chain)
+    np.testing.assert_array_equal(deferred.unique_values, eager.unique_values, err_msg=chain)
+    assert deferred.is_binary == eager.is_binary
+    assert deferred.foreground_count == eager.foreground_count
+
+
+def test_deferred_ops_fuse_into_one_pass():
+    pixels = np.random.default_rng(0).integers(0, 256, (30, 40), dtype=np.uint8)
+    image = Image.from_numpy(pixels, "fused")
+
+    with image.deferred_point_ops():
+        image.negate()
+        image.posterize(4)
+        image.thresholding(100)
+        # The stored pixels are untouched until the block ends
+        assert image.has_pending_point_ops
+        np.testing.assert_array_equal(image._stored_pixels(), pixels)
+
+    eager = Image.from_numpy(pixels, "eager")
+    eager.negate()
+    eager.posterize(4)
+    eager.thresholding(100)
+    np.testing.assert_array_equal(image.img, eager.img)
@@ -0,0 +1,75 @@
+import cv2 as cv
+import numpy as np
+import pytest
+from scipy import ndimage
+
+from rank_filters import rank_filter, SCIPY_BORDER_MODES, _sorts_directly
+
+LMIN = 0
+LMAX = 255
+SHAPE = (23, 31)
+WINDOWS = [(1, 3), (3, 3), (5, 5), (7, 3), (9, 9)]
+PERCENTILES = [0, 10, 50, 90, 100]
+
+
+def images():
+    rng = np.random.default_rng(0)
+    grey = rng.integers(LMIN, LMAX + 1, SHAPE, dtype=np.uint8)
+    return {
+        "grey": grey,
+        "few_levels": (grey // 64 * 64).astype(np.uint8),
+        "binary": np.where(grey > 127, LMAX, LMIN).astype(np.uint8),
+        "colour": rng.integers(LMIN, LMAX + 1, SHAPE + (3,), dtype=np.uint8),
+        "float": rng.random(SHAPE).astype(np.float32),
+    }
+
+
+IMAGES = images()
+
+
+def scipy_reference(img: np.ndarray, width: int, height: int, percentile: float, border_type: int) -> np.ndarray:
+    size = (height, width) + (1,) * (img.ndim - 2)
+    mode = SCIPY_BORDER_MODES[border_type]
+    return ndimage.percentile_filter(img, percentile, size=size, mode=mode, cval=0)
+
+
+@pytest.mark.parametrize("name", IMAGES)
+@pytest.mark.parametrize("width, height", WINDOWS)
+@pytest.mark.parametrize("percentile", PERCENTILES)
+@pytest.mark.parametrize("border_type", SCIPY_BORDER_MODES)
+def test_matches_scipy(name, width, height, percentile, border_type):
+    img = IMAGES[name]
+    # Strips of 4 rows put strip boundaries inside every window taller than one row
+    result = rank_filter(img, width, height, percentile, border_type, strip_rows=4)
+    np.testing.assert_array_equal(result, scipy_reference(img, width, height, percentile, border_type))
+
+
+@pytest.mark.parametrize("border_type", SCIPY_BORDER_MODES)
+@pytest.mark.parametrize("reference, percentile", [(ndimage.minimum_filter, 0), (ndimage.maximum_filter, 100)])
+def test_min_max(border_type, reference, percentile):
+    img = IMAGES["grey"]
+    expected = reference(img, size=(5, 7), mode=SCIPY_BORDER_MODES[border_type], cval=0)
+    np.testing.assert_array_equal(rank_filter(img, 7, 5, percentile, border_type, strip_rows=3), expected)
+
+
+@pytest.mark.parametrize("strip_rows", [1, 2, 3, 4, 7, 22, 23, 256])
+@pytest.mark.parametrize("name", ["grey", "colour"])
+def test_strip_heights(strip_rows, name):
+    img = IMAGES[name]
+    result = rank_filter(img, 5, 9, 30, cv.BORDER_REFLECT_101, strip_rows=strip_rows)
+    np.testing.assert_array_equal(result, scipy_reference(img, 5, 9, 30, cv.BORDER_REFLECT_101))
+
+
+def test_small_windows_sort_directly():
+    assert _sorts_directly(3 * 3, 2)
+    assert _sorts_directly(5 * 5, 256)
+    assert not _sorts_directly(5 * 5, 16)
+    assert not _sorts_directly(7 * 7, 256)
+
+
+@pytest.mark.parametrize("width, height, percentile, strip_rows", [
+    (2, 3, 50, 4), (3, 4, 50, 4), (0, 3, 50, 4), (3, 3, -1, 4), (3, 3, 101, 4), (3, 3, 50, 0)
+])
+def test_invalid_arguments(width, height, percentile, strip_rows):
+    with pytest.raises(ValueError):
+        rank_filter(IMAGES["grey"], width, height, percentile, cv.BORDER_REPLICATE, strip_rows=strip_rows)
@@ -0,0 +1,139 @@
+import os
+import time
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from image_utils import (make_binary_rle, make_binary_rle_arrays, parse_binary_rle, parse_binary_rle_runs,
+                         stream_binary_rle, make_rle_v2, parse_rle_v2, measure_codecs, RLECompression, RLEEncoding)
+from utils import run_lengths
+
+RLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_images", "rle")
+RLE_FILES = sorted(os.listdir(RLE_DIR))
+
+# Far below what the structured dtypes reach (hundreds of MB/s), far above the original byte-by-byte decoder
+# (under 10 MB/s); benchmarks/bench_rle_binary.py reports the actual figures
+MIN_THROUGHPUT_MB_S = 50
+THROUGHPUT_SIZE = (2000, 1500)
+
+
+def read_rle(name: str) -> bytearray:
+    with open(os.path.join(RLE_DIR, name), "rb") as f:
+        return bytearray(f.read())
+
+
+def legacy_parse_binary_rle(input_bytes: bytearray) -> np.ndarray:
+    # The original byte-by-byte decoder, kept as the reference the vectorized one must agree with
+    temp_bytes = input_bytes.copy()
+    height = int.from_bytes(temp_bytes[:4], byteorder="big")
+    del temp_bytes[:4]
+    width = int.from_bytes(temp_bytes[:4], byteorder="big")
+    del temp_bytes[:4]
+
+    result = np.zeros(height * width, dtype=np.uint8)
+    filled = 0
+    while temp_bytes:
+        value = int.from_bytes(temp_bytes[:2], byteorder="big")
+        count = int.from_bytes(temp_bytes[2:6], byteorder="big")
+        del temp_bytes[:6]
+        result[filled: filled + count] = value
+        filled += count
+
+    return result.reshape((height, width))
+
+
+@pytest.fixture(scope="module", params=RLE_FILES)
+def rle_file(request):
+    data = read_rle(request.param)
+    return request.param, data, legacy_parse_binary_rle(data)
+
+
+def test_parse_matches_legacy_decoder(rle_file):
+    name, data, expected = rle_file
+    np.testing.assert_array_equal(parse_binary_rle(data), expected)
+
+
+def test_reencoding_writes_the_same_bytes(rle_file):
+    name, data, expected = rle_file
+    height, width, values, counts = parse_binary_rle_runs(data)
+
+    assert make_binary_rle_arrays(values, counts, height, width) == data
+    assert make_binary_rle(list(zip(values.tolist(), counts.tolist())), height, width) == data
+
+
+def test_round_trip_through_run_lengths(rle_file):
+    name, data, expected = rle_file
+    encoded = make_binary_rle_arrays(*run_lengths(expected), *expected.shape)
+    np.testing.assert_array_equal(parse_binary_rle(encoded), expected)
+
+
+def test_stream_matches_parse(rle_file, tmp_path):
+    name, data, expected = rle_file
+    path = os.path.join(RLE_DIR, name)
+
+    np.testing.assert_array_equal(stream_binary_rle(path), expected)
+
+    # Row ranges and small chunks exercise the clipping at both ends of a chunk
+    height = expected.shape[0]
+    rows = (height // 3, height // 3 + max(height // 4, 1))
+    np.testing.assert_array_equal(stream_binary_rle(path, *rows, chunk_runs=7, chunk_pixels=64),
+                                  expected[rows[0]: rows[1]])
+
+    memmap = stream_binary_rle(path, out=str(tmp_path / "out.raw"))
+    np.testing.assert_array_equal(np.asarray(memmap), expected)
+
+
+@pytest.mark.parametrize("compression", list(RLECompression))
+def test_v2_round_trip(rle_file, compression):
+    name, data, expected = rle_file
+    encoded = make_rle_v2(expected, compression=compression, strip_rows=5)
+
+    np.testing.assert_array_equal(parse_binary_rle(encoded), expected)
+
+    height = expected.shape[0]
+    rows = (height // 3, height // 3 + max(height // 4, 1))
+    np.testing.assert_array_equal(parse_rle_v2(encoded, *rows), expected[rows[0]: rows[1]])
+
+
+def test_v2_binary_encoding(rle_file):
+    name, data, expected = rle_file
+    binary = np.where(expected > 127, 255, 0).astype(np.uint8)
+    encoded = make_rle_v2(binary, encoding=RLEEncoding.BINARY)
+    np.testing.assert_array_equal(parse_rle_v2(encoded), binary)
+
+
+def test_v2_round_trip_16_bit_color():
+    img = np.random.default_rng(0).integers(0, 4, (37, 23, 3)).astype(np.uint16) * 20000
+    np.testing.assert_array_equal(parse_rle_v2(make_rle_v2(img, strip_rows=4)), img)
+
+
+def test_measure_codecs_skips_unsupported_pixels():
+    rows = {name: size for name, size, *_ in measure_codecs(np.random.default_rng(0).random((20, 20)) * 255, 1)}
+
+    assert rows["RLE v1"] is None
+    assert rows["RLE v2"] is None
+    assert rows["NPY"] is not None
+
+
+def best_seconds(f, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.benchmark
+def test_throughput():
+    # A photo has a run almost every pixel, the worst case for run-length coding
+    img = cv.resize(cv.imread(os.path.join(os.path.dirname(RLE_DIR), "lena.png"), cv.IMREAD_GRAYSCALE),
+                    THROUGHPUT_SIZE)
+    values, counts = run_lengths(img)
+    encoded = make_binary_rle_arrays(values, counts, *img.shape)
+    megabytes = len(encoded) / 1e6
+
+    np.testing.assert_array_equal(parse_binary_rle(encoded), img)
+    assert megabytes / best_seconds(lambda: make_binary_rle_arrays(values, counts, *img.shape)) > MIN_THROUGHPUT_MB_S
+    assert megabytes / best_seconds(lambda: parse_binary_rle(encoded)) > MIN_THROUGHPUT_MB_S
@@ -0,0 +1,100 @@
+import cv2 as cv
+import numpy as np
+import pytest
+
+from image_utils import (and_runs, or_runs, xor_runs, not_runs, merge_runs, expand_runs, runs_histogram,
+                         runs_pixel_count, runs_row_bounds, runs_bounding_box)
+from utils import run_lengths
+
+LMIN = 0
+LMAX = 255
+SHAPE = (23, 37)
+
+
+def masks():
+    rng = np.random.default_rng(0)
+    height, width = SHAPE
+    result = {
+        "empty": np.zeros(SHAPE, dtype=np.uint8),
+        "full": np.full(SHAPE, LMAX, dtype=np.uint8),
+        "noise": np.where(rng.random(SHAPE) > 0.5, LMAX, LMIN).astype(np.uint8),
+        "sparse": np.where(rng.random(SHAPE) > 0.97, LMAX, LMIN).astype(np.uint8),
+    }
+
+    # Runs that start at a row's first pixel, end at its last one, or wrap onto the next rows
+    edges = np.zeros(SHAPE, dtype=np.uint8)
+    edges[2, :5] = LMAX
+    edges[4, -6:] = LMAX
+    edges.reshape(-1)[7 * width - 3: 9 * width + 4] = LMAX
+    edges[0, 0] = edges[-1, -1] = LMAX
+    result["edges"] = edges
+
+    corners = np.zeros(SHAPE, dtype=np.uint8)
+    corners[0, -1] = corners[-1, 0] = LMAX
+    result["corners"] = corners
+    return result
+
+
+MASKS = masks()
+
+
+def runs_of(mask: np.ndarray, split: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    values, counts = run_lengths(mask)
+    if split:
+        # Unmerged runs and empty ones, as other writers may produce
+        values = np.repeat(values, 2)
+        counts = np.stack([counts // 2, counts - counts // 2], axis=1).ravel()
+    return values, counts.astype(np.int64)
+
+
+def expanded(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    return expand_runs(values, counts, SHAPE[0] * SHAPE[1]).reshape(SHAPE)
+
+
+@pytest.mark.parametrize("split", [False, True])
+@pytest.mark.parametrize("name_a", MASKS)
+@pytest.mark.parametrize("name_b", MASKS)
+@pytest.mark.parametrize("op, expected", [(and_runs, cv.bitwise_and), (or_runs, cv.bitwise_or),
+                                          (xor_runs, cv.bitwise_xor)])
+def test_binary_ops_match_expanded_masks(op, expected, name_a, name_b, split):
+    a, b = MASKS[name_a], MASKS[name_b]
+    values, counts = op(*runs_of(a, split), *runs_of(b))
+    np.testing.assert_array_equal(expanded(values, counts), expected(a, b))
+
+
+@pytest.mark.parametrize("split", [False, True])
+@pytest.mark.parametrize("name", MASKS)
+def test_not_and_merge_match_expanded_mask(name, split):
+    mask = MASKS[name]
+    values, counts = runs_of(mask, split)
+
+    np.testing.assert_array_equal(expanded(*not_runs(values, counts)), cv.bitwise_not(mask))
+
+    merged_values, merged_counts = merge_runs(values, counts)
+    np.testing.assert_array_equal(expanded(merged_values, merged_counts), mask)
+    assert np.all(merged_counts > 0)
+    assert np.all(merged_values[1:] != merged_values[:-1])
+
+
+@pytest.mark.parametrize("split", [False, True])
+@pytest.mark.parametrize("name", MASKS)
+def test_statistics_match_expanded_mask(name, split):
+    mask = MASKS[name]
+    values, counts = runs_of(mask, split)
+
+    np.testing.assert_array_equal(runs_histogram(values, counts), np.bincount(mask.ravel(), minlength=LMAX + 1))
+    assert runs_pixel_count(values, counts) == cv.countNonZero(mask)
+    assert runs_bounding_box(values, counts, SHAPE[1]) == cv.boundingRect(mask)
+
+    bounds = runs_row_bounds(values, counts, SHAPE[1])
+    for row, (first, last) in enumerate(bounds):
+        columns = np.flatnonzero(mask[row])
+        if columns.size == 0:
+            assert (first, last) == (-1, -1)
+        else:
+            assert (first, last) == (columns[0], columns[-1])
+
+
+def test_masks_of_different_sizes_are_rejected():
+    with pytest.raises(ValueError):
+        and_runs(*runs_of(MASKS["noise"]), np.array([LMAX]), np.array([5]))
@@ -0,0 +1,110 @@
+import os
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from skeletonization import zhang_suen_thinning
+
+LMIN = 0
+LMAX = 255
+TEST_IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_images")
+
+
+def reference_zhang_suen(img: np.ndarray, max_iterations: int | None = None) -> np.ndarray:
+    # The textbook version, pixel by pixel: each sub-iteration marks every removable pixel first and deletes them after
+    height, width = img.shape
+    bits = np.zeros((height + 2, width + 2), dtype=np.uint8)
+    bits[1:-1, 1:-1] = img != LMIN
+
+    iteration = 0
+    while max_iterations is None or iteration < max_iterations:
+        changed = False
+        for step in range(2):
+            marked = []
+            for y in range(1, height + 1):
+                for x in range(1, width + 1):
+                    if not bits[y, x]:
+                        continue
+                    p2, p3, p4, p5 = bits[y - 1, x], bits[y - 1, x + 1], bits[y, x + 1], bits[y + 1, x + 1]
+                    p6, p7, p8, p9 = bits[y + 1, x], bits[y + 1, x - 1], bits[y, x - 1], bits[y - 1, x - 1]
+                    ring = [p2, p3, p4, p5, p6, p7, p8, p9]
+
+                    neighbours = sum(ring)
+                    transitions = sum(ring[i] == 0 and ring[(i + 1) % 8] == 1 for i in range(8))
+                    if not 2 <= neighbours <= 6 or transitions != 1:
+                        continue
+                    if step == 0 and (p2 * p4 * p6 or p4 * p6 * p8):
+                        continue
+                    if step == 1 and (p2 * p4 * p8 or p2 * p6 * p8):
+                        continue
+                    marked.append((y, x))
+
+            for y, x in marked:
+                bits[y, x] = 0
+            changed = changed or len(marked) > 0
+
+        iteration += 1
+        if not changed:
+            break
+
+    return bits[1:-1, 1:-1] * np.uint8(LMAX)
+
+
+def shapes() -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    result = {
+        "empty": np.zeros((9, 13), dtype=np.uint8),
+        "full": np.full((9, 13), LMAX, dtype=np.uint8),
+        "dot": np.pad(np.full((1, 1), LMAX, dtype=np.uint8), 3),
+        "noise": np.where(rng.random((24, 31)) > 0.4, LMAX, LMIN).astype(np.uint8),
+    }
+
+    # Thick strokes, ones touching the image border, and a ring whose hole has to survive
+    strokes = np.zeros((40, 48), dtype=np.uint8)
+    cv.line(strokes, (2, 5), (45, 30), LMAX, 5)
+    cv.rectangle(strokes, (0, 0), (12, 39), LMAX, -1)
+    cv.circle(strokes, (32, 12), 8, LMAX, 4)
+    result["strokes"] = strokes
+
+    blobs = cv.resize(np.where(rng.random((8, 10)) > 0.5, LMAX, LMIN).astype(np.uint8), (50, 40),
+                      interpolation=cv.INTER_NEAREST)
+    result["blobs"] = blobs
+    return result
+
+
+SHAPES = shapes()
+
+
+@pytest.mark.parametrize("name", SHAPES)
+def test_matches_reference(name):
+    img = SHAPES[name]
+    np.testing.assert_array_equal(zhang_suen_thinning(img), reference_zhang_suen(img))
+
+
+@pytest.mark.parametrize("name", ["strokes", "blobs"])
+@pytest.mark.parametrize("max_iterations", [1, 2, 3])
+def test_matches_reference_cut_short(name, max_iterations):
+    img = SHAPES[name]
+    np.testing.assert_array_equal(zhang_suen_thinning(img, max_iterations),
+                                  reference_zhang_suen(img, max_iterations))
+
+
+def test_matches_reference_on_bundled_mask():
+    img = cv.imread(os.path.join(TEST_IMAGES_DIR, "3shapes.bmp"), cv.IMREAD_GRAYSCALE)
+    img = cv.resize(img, (img.shape[1] // 8, img.shape[0] // 8), interpolation=cv.INTER_NEAREST)
+    img = np.where(img > LMAX // 2, LMAX, LMIN).astype(np.uint8)
+    np.testing.assert_array_equal(zhang_suen_thinning(img), reference_zhang_suen(img))
+
+
+def test_progress_stops_early():
+    img = SHAPES["strokes"]
+    calls = []
+
+    def progress(iteration, remaining):
+        calls.append(iteration)
+        return False
+
+    result = zhang_suen_thinning(img, progress=progress)
+    assert calls == [1]
+    np.testing.assert_array_equal(result, reference_zhang_suen(img, 1))
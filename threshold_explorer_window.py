@@ -0,0 +1,163 @@
+import cv2 as cv
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSlider, QSpinBox, QLabel, QPushButton, \
+    QCheckBox, QGroupBox
+
+from forms.form_widgets.array_preview import ArrayPreview, MAX_SIZE
+from widgets.mplcanvas import MplCanvas
+from window_manager import WINDOW_MANAGER
+
+LMIN = 0
+LMAX = 255
+
+PLOT_MIN_WIDTH = 480
+
+
+class ThresholdExplorerWindow(QMainWindow):
+    def __init__(self, parent: QMainWindow):
+        super().__init__()
+        WINDOW_MANAGER.add_window(self)
+        self.parent_window = parent
+        self.threshold = (LMAX + 1) // 2
+
+        self.widget = QWidget(self)
+        self.layout = QVBoxLayout()
+        self.widget.setLayout(self.layout)
+        self.setCentralWidget(self.widget)
+
+        self.view_layout = QHBoxLayout()
+        self.layout.addLayout(self.view_layout)
+
+        self.plot_canvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.plot_canvas.setMinimumSize(PLOT_MIN_WIDTH, MAX_SIZE)
+        self.plot_canvas.mpl_connect("button_press_event", self.plot_dragged)
+        self.plot_canvas.mpl_connect("motion_notify_event", self.plot_dragged)
+        self.view_layout.addWidget(self.plot_canvas)
+
+        self.preview_group = QGroupBox("Preview")
+        self.view_layout.addWidget(self.preview_group)
+        self.preview_group_layout = QVBoxLayout()
+        self.preview_group.setLayout(self.preview_group_layout)
+        self.preview = ArrayPreview()
+        self.preview_group_layout.addWidget(self.preview)
+
+        self.threshold_layout = QHBoxLayout()
+        self.layout.addLayout(self.threshold_layout)
+        self.threshold_layout.addWidget(QLabel("Threshold"))
+
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setRange(LMIN, LMAX)
+        self.threshold_layout.addWidget(self.slider)
+
+        self.spin_box = QSpinBox()
+        self.spin_box.setRange(LMIN, LMAX)
+        self.threshold_layout.addWidget(self.spin_box)
+
+        self.stats_label = QLabel()
+        self.layout.addWidget(self.stats_label)
+
+        self.buttons_layout = QHBoxLayout()
+        self.layout.addLayout(self.buttons_layout)
+
+        self.otsu_button = QPushButton()
+        self.otsu_button.clicked.connect(lambda: self.set_threshold(self.statistics.otsu_threshold))
+        self.buttons_layout.addWidget(self.otsu_button)
+
+        self.entropy_button = QPushButton()
+        self.entropy_button.clicked.connect(lambda: self.set_threshold(self.statistics.max_entropy_threshold))
+        self.buttons_layout.addWidget(self.entropy_button)
+
+        self.inv_checkbox = QCheckBox("Inverted")
+        self.inv_checkbox.stateChanged.connect(lambda: self.update_threshold_display())
+        self.buttons_layout.addWidget(self.inv_checkbox)
+
+        self.apply_button = QPushButton("Apply")
+        self.apply_button.clicked.connect(self.apply)
+        self.buttons_layout.addWidget(self.apply_button)
+
+        self.slider.valueChanged.connect(self.set_threshold)
+        self.spin_box.valueChanged.connect(self.set_threshold)
+
+        self.update_data()
+
+    def update_data(self):
+        self.image = self.parent_window.image
+        self.statistics = self.image.threshold_statistics()
+        self.setWindowTitle(f"Threshold Explorer: {self.image.name}")
+
+        # Dragging only ever thresholds this nearest-neighbour thumbnail, which shows exactly the pixels
+        # a shrunk result would; the statistics come from the histogram alone
+        pixels = self.image.img
+        height, width = pixels.shape[:2]
+        scale = min(MAX_SIZE / width, MAX_SIZE / height, 1)
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        self.thumbnail = cv.resize(pixels, size, interpolation=cv.INTER_NEAREST)
+
+        self.otsu_button.setText(f"Otsu ({self.statistics.otsu_threshold})")
+        self.entropy_button.setText(f"Max Entropy ({self.statistics.max_entropy_threshold})")
+
+        self.draw()
+        self.update_threshold_display()
+
+    def draw(self):
+        axes = self.plot_canvas.axes
+        axes.clear()
+        axes.set_title(self.image.name)
+        axes.set_xlim(LMIN - 0.5, LMAX + 0.5)
+        axes.set_ylim(0, 1.05)
+
+        # Everything is scaled to [0, 1] so that the curves share the axes with the histogram
+        x = np.arange(LMIN, LMAX + 1)
+        counts = self.statistics.counts
+        variance = self.statistics.between_class_variance
+        entropy = self.statistics.entropy
+        axes.bar(x, counts / max(counts.max(), 1), color="lightgray", align="center", width=1.0)
+        axes.plot(x, self.statistics.foreground_fraction, label="Foreground fraction")
+        axes.plot(x, variance / max(variance.max(), np.finfo(np.float64).tiny), label="Between-class variance")
+        axes.plot(x, entropy / max(entropy.max(), np.finfo(np.float64).tiny), label="Entropy")
+        axes.legend(loc="upper right", fontsize="small")
+
+        self.threshold_line = axes.axvline(self.threshold, color="red")
+        self.plot_canvas.figure.tight_layout(pad=2)
+        self.plot_canvas.draw()
+
+    def set_threshold(self, threshold: int):
+        self.threshold = int(np.clip(threshold, LMIN, LMAX))
+        self.update_threshold_display()
+
+    def update_threshold_display(self):
+        threshold = self.threshold
+        for control in (self.slider, self.spin_box):
+            control.blockSignals(True)
+            control.setValue(threshold)
+            control.blockSignals(False)
+
+        foreground = self.statistics.foreground_fraction[threshold]
+        if self.inv_checkbox.isChecked():
+            foreground = 1.0 - foreground
+        self.stats_label.setText(
+            f"Foreground: {foreground * 100:.2f}%   "
+            f"Between-class variance: {self.statistics.between_class_variance[threshold]:.2f}   "
+            f"Entropy: {self.statistics.entropy[threshold]:.3f}")
+
+        thresholding_mode = cv.THRESH_BINARY if not self.inv_checkbox.isChecked() else cv.THRESH_BINARY_INV
+        th, preview = cv.threshold(self.thumbnail, threshold, LMAX, thresholding_mode)
+        self.preview.show_array(preview)
+
+        self.threshold_line.set_xdata([threshold, threshold])
+        self.plot_canvas.draw_idle()
+
+    def plot_dragged(self, event):
+        if event.inaxes is not self.plot_canvas.axes or event.button != 1 or event.xdata is None:
+            return
+        self.set_threshold(round(event.xdata))
+
+    def apply(self):
+        self.parent_window.image.thresholding(self.threshold, self.inv_checkbox.isChecked())
+        self.parent_window.refresh_image()
+
+    def closeEvent(self, event):
+        self.parent_window.threshold_explorer_window = None
+        WINDOW_MANAGER.remove_window(self)
+        event.accept()
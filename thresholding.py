@@ -0,0 +1,105 @@
+import math
+from collections import OrderedDict
+
+import cv2 as cv
+import numpy as np
+
+LMAX = 255
+
+# Local statistics kept per session, the least recently used pair is dropped first
+ADAPTIVE_CACHE_SIZE = 4
+
+# cv.adaptiveThreshold extends the image by replicating its edges and never reads past them
+ADAPTIVE_BORDER = cv.BORDER_REPLICATE | cv.BORDER_ISOLATED
+
+
+class AdaptiveThresholdSession:
+    def __init__(self, img: np.ndarray, cache_size: int = ADAPTIVE_CACHE_SIZE):
+        if img.dtype != np.uint8:
+            raise ValueError("Adaptive thresholding needs 8-bit pixels!")
+        if cache_size < 1:
+            raise ValueError("The cache must hold at least one entry!")
+
+        # The pixels must not change while the session is in use, the image hands over a read-only buffer
+        self.img = img
+        self.cache_size = cache_size
+        self._differences = OrderedDict()
+
+    def local_mean(self, block_size: int, gaussian_mode: bool = False) -> np.ndarray:
+        # The same 8-bit local mean cv.adaptiveThreshold compares against
+        size = (block_size, block_size)
+        if not gaussian_mode:
+            return cv.boxFilter(self.img, -1, size, normalize=True, borderType=ADAPTIVE_BORDER)
+
+        mean = cv.GaussianBlur(cv.add(self.img, 0.0, dtype=cv.CV_32F), size, 0, borderType=ADAPTIVE_BORDER)
+        return cv.add(mean, 0.0, dtype=cv.CV_8U)
+
+    def _difference(self, block_size: int, gaussian_mode: bool) -> np.ndarray:
+        # Pixels minus their local mean, so that any C is a single comparison
+        key = (block_size, gaussian_mode)
+        if key in self._differences:
+            self._differences.move_to_end(key)
+            return self._differences[key]
+
+        difference = cv.subtract(self.img, self.local_mean(block_size, gaussian_mode), dtype=cv.CV_16S)
+        self._differences[key] = difference
+        if len(self._differences) > self.cache_size:
+            self._differences.popitem(last=False)
+        return difference
+
+    def threshold(self, block_size: int, c: float, gaussian_mode: bool = False, inv: bool = False) -> np.ndarray:
+        if block_size % 2 == 0 or block_size < 3:
+            raise ValueError("Block size must be odd and greater than 3.")
+
+        difference = self._difference(block_size, gaussian_mode)
+        # As cv.adaptiveThreshold rounds C: up for the binary mode, down for the inverted one
+        if not inv:
+            return cv.compare(difference, -math.ceil(c), cv.CMP_GT)
+        return cv.compare(difference, -math.floor(c), cv.CMP_LE)
+
+
+class ThresholdStatistics:
+    def __init__(self, counts: np.ndarray):
+        # Every statistic for all thresholds at once, from prefix sums over the histogram. A threshold t puts
+        # the levels above it in the foreground, as in thresholding.
+        counts = np.asarray(counts, dtype=np.float64)
+        total = counts.sum()
+        if total == 0:
+            raise ValueError("The histogram is empty!")
+
+        p = counts / total
+        levels = np.arange(p.size)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p_log_p = np.where(p > 0, p * np.log(p), 0.0)
+
+        # Background sums run up to t, foreground sums from t + 1, both accumulated from their own end
+        # so that neither loses precision to a subtraction near the edges
+        q1 = np.cumsum(p)
+        q2 = np.append(np.cumsum(p[::-1])[::-1][1:], 0.0)
+        mass1 = np.cumsum(levels * p)
+        mass2 = np.append(np.cumsum((levels * p)[::-1])[::-1][1:], 0.0)
+        h1 = np.cumsum(p_log_p)
+        h2 = np.append(np.cumsum(p_log_p[::-1])[::-1][1:], 0.0)
+
+        self.counts = counts
+        self.foreground_fraction = q2
+
+        # Same cut-off as otsu_threshold for classes too small to trust
+        eps = float(np.finfo(np.float32).eps)
+        valid = (np.minimum(q1, q2) >= eps) & (np.maximum(q1, q2) <= 1.0 - eps)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mu1 = mass1 / q1
+            mu2 = mass2 / q2
+            self.between_class_variance = np.where(valid, q1 * q2 * (mu1 - mu2) ** 2, 0.0)
+
+            # Kapur's criterion: the entropy of the background plus that of the foreground, in nats
+            entropy = np.log(q1) - h1 / q1 + np.log(q2) - h2 / q2
+            self.entropy = np.where(valid, entropy, 0.0)
+
+    @property
+    def otsu_threshold(self) -> int:
+        return int(np.argmax(self.between_class_variance))
+
+    @property
+    def max_entropy_threshold(self) -> int:
+        return int(np.argmax(self.entropy))
@@ -1,17 +1,60 @@
+import cv2 as cv
 import numpy as np
 from scipy.signal import convolve2d
 
 
 def cumsum(arr: np.array) -> np.ndarray:
-    csum = np.zeros_like(arr)
-    csum[0] = arr[0]
+    return np.cumsum(arr, dtype=arr.dtype)
 
-    # idx will be moved to 0, so no subtraction needed
-    # addition is needed instead
-    for idx, val in enumerate(arr[1:]):
-        csum[idx + 1] = csum[idx] + val
 
-    return csum
+def run_lengths(arr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    flat = arr.ravel()
+    if flat.size == 0:
+        return flat[:0], np.zeros(0, dtype=np.int64)
+
+    # A run starts at the first element and wherever an element differs from its predecessor
+    run_starts = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    run_starts = np.concatenate(([0], run_starts))
+
+    values = flat[run_starts]
+    counts = np.diff(np.append(run_starts, flat.size))
+
+    return values, counts
+
+
+# Packed binary rows: bit i of a row is pixel i, rows padded with zero bits to whole 64-bit words
+PACKED_WORD_BITS = 64
+POPCOUNT_TABLE = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def pack_bits(arr: np.ndarray) -> np.ndarray:
+    rows = arr.reshape(arr.shape[0], -1)
+    words_per_row = (rows.shape[1] + PACKED_WORD_BITS - 1) // PACKED_WORD_BITS
+
+    packed = np.zeros((rows.shape[0], words_per_row * (PACKED_WORD_BITS // 8)), dtype=np.uint8)
+    # packbits sets a bit for every nonzero byte, other types are compared first
+    bits = rows if rows.dtype in (np.uint8, np.bool_) else rows != 0
+    packed[:, :(rows.shape[1] + 7) // 8] = np.packbits(bits, axis=1, bitorder="little")
+
+    return packed.view("<u8")
+
+
+def unpack_bits(words: np.ndarray, width: int, one: int = 1) -> np.ndarray:
+    pixels = np.unpackbits(words.view(np.uint8), axis=1, count=width, bitorder="little")
+    if one != 1:
+        pixels *= np.uint8(one)
+    return pixels
+
+
+def packed_row_mask(width: int) -> np.ndarray:
+    # Words with only the bits of real pixels set, for operations that would touch the row padding
+    return pack_bits(np.ones((1, width), dtype=np.uint8))
+
+
+def popcount(words: np.ndarray) -> int:
+    if words.size == 0:
+        return 0
+    return int(cv.sumElems(cv.LUT(words.view(np.uint8), POPCOUNT_TABLE))[0])
 
 
 def convolve_filters(f1: np.ndarray, f2: np.ndarray) -> np.ndarray: